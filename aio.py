@@ -0,0 +1,230 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import asyncio
+import threading
+from datetime import datetime
+from flask import g, render_template, url_for, abort
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import selectinload, raiseload
+from sqlalchemy.pool import NullPool
+from models import app, db, Venue, Artist, Show
+from queries import venue_directory, artist_list, upcoming_shows, show_counts, shows_for_venue, shows_for_artist
+from conditional import make_etag, list_state, upcoming_shows_state, detail_state, detail_validators_for, client_is_current, conditional_response
+from cache import page_cache
+from database import reads_from_replica
+from app import page_args, page_cacheable
+
+#----------------------------------------------------------------------------#
+# Async engine
+#----------------------------------------------------------------------------#
+
+# Opt-in with ASYNC_VIEWS. The listing and detail pages are then served by
+# async views that run their queries on SQLAlchemy's asyncio engine
+# (asyncpg, or aiosqlite for SQLite), the independent ones concurrently.
+#
+# Flask runs each async view on an event loop of its own, but an asyncpg
+# connection belongs to the loop that opened it, so pooled connections
+# cannot outlive a request's loop. The async engines live on one
+# long-running loop in a background thread instead; views hand it their
+# queries and await the results.
+#
+# Queries are the ones in queries.py and conditional.py: each runs through
+# AsyncSession.run_sync in a greenlet of its own, which is also what
+# db.session is scoped to, so db.session is pointed at that session for
+# the duration of the call.
+
+def async_url(url):
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == 'postgresql':
+        return url.set(drivername = 'postgresql+asyncpg')
+    if backend == 'sqlite':
+        return url.set(drivername = 'sqlite+aiosqlite')
+    raise ValueError('No asyncio driver for %s databases.' % backend)
+
+def async_engine_options(config, url):
+    if url.get_backend_name() != 'postgresql':
+        return {}
+    if config['DB_PGBOUNCER']:
+        # asyncpg prepares statements and caches them per connection, which
+        # PgBouncer in transaction mode cannot follow; the statement timeout
+        # is set per transaction by the listener in database.py
+        return {
+            'poolclass': NullPool,
+            'connect_args': { 'statement_cache_size': 0, 'prepared_statement_cache_size': 0 }
+        }
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+        'connect_args': { 'server_settings': { 'statement_timeout': str(config['DB_STATEMENT_TIMEOUT_MS']) } }
+    }
+
+def run_scoped(session, call):
+    db.session.registry.set(session)
+    try:
+        return call()
+    finally:
+        db.session.registry.clear()
+
+class AsyncDatabase:
+
+    def __init__(self, app):
+        self.app = app
+        self._loop = None
+        self._lock = threading.Lock()
+        # One engine per bind (None is the primary), only used on the loop
+        self._engines = {}
+
+    def loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target = self._loop.run_forever, name = 'async-db', daemon = True).start()
+        return self._loop
+
+    def engine(self, bind_key = None):
+        if bind_key not in self._engines:
+            if bind_key is None:
+                url = self.app.config['SQLALCHEMY_DATABASE_URI']
+            else:
+                url = self.app.config['SQLALCHEMY_BINDS'][bind_key]
+            url = async_url(url)
+            self._engines[bind_key] = create_async_engine(url, **async_engine_options(self.app.config, url))
+        return self._engines[bind_key]
+
+    async def _call(self, engine, call):
+        async with AsyncSession(engine) as session:
+            return await session.run_sync(run_scoped, call)
+
+    async def _gather(self, bind_key, calls):
+        engine = self.engine(bind_key)
+        return await asyncio.gather(*[self._call(engine, call) for call in calls])
+
+    async def run(self, *calls):
+        """
+        Run each call (a function of no arguments that queries through
+        db.session) in a session and connection of its own, all at once, on
+        the request's replica or the primary. Returns their results in order
+        """
+        future = asyncio.run_coroutine_threadsafe(self._gather(g.get('db_bind'), calls), self.loop())
+        return await asyncio.wrap_future(future)
+
+async_db = AsyncDatabase(app)
+
+#----------------------------------------------------------------------------#
+# Views
+#----------------------------------------------------------------------------#
+
+# Same pages, caching and validators as the sync views in app.py
+
+async def listing(state, loader, template, context):
+    cursor, limit = page_args()
+    state, = await async_db.run(state)
+    etag = make_etag(*state)
+    if client_is_current(etag):
+        return conditional_response(etag, None, None)
+    try:
+        page, = await async_db.run(lambda: loader(cursor = cursor, limit = limit))
+    except ValueError:
+        abort(400)
+    return conditional_response(etag, None, render_template(template, page = page, **context(page)))
+
+@reads_from_replica
+async def venues():
+    return await listing(
+        lambda: list_state(Venue),
+        venue_directory,
+        'pages/venues.html',
+        context = lambda page: { 'areas': page['items'] }
+    )
+
+@reads_from_replica
+async def artists():
+    return await listing(
+        lambda: list_state(Artist),
+        artist_list,
+        'pages/artists.html',
+        context = lambda page: { 'artists': page['items'] }
+    )
+
+@reads_from_replica
+async def shows():
+    today = datetime(datetime.today().year, datetime.today().month, datetime.today().day)
+    return await listing(
+        lambda: upcoming_shows_state(today),
+        lambda cursor, limit: upcoming_shows(today, cursor = cursor, limit = limit),
+        'pages/shows.html',
+        context = lambda page: { 'shows': page['items'] }
+    )
+
+# A detail page's entity, upcoming shows, past shows and show counts are
+# loaded at once, each on its own connection
+
+DETAIL_PAGES = {
+    'venue': (Venue, Show.venue_id, shows_for_venue, 'show_venue_shows', 'pages/show_venue.html', 'edit_venue'),
+    'artist': (Artist, Show.artist_id, shows_for_artist, 'show_artist_shows', 'pages/show_artist.html', 'edit_artist'),
+}
+
+async def detail_page(kind, entity_id):
+    model, own_key, loader, shows_endpoint, template, edit_endpoint = DETAIL_PAGES[kind]
+    id_arg = { kind + '_id': entity_id }
+
+    cacheable = page_cacheable(kind, entity_id)
+    if cacheable:
+        cache_key = page_cache.key(kind, entity_id)
+
+    now = datetime.now()
+    state, = await async_db.run(lambda: detail_state(model, entity_id, now))
+    validators = detail_validators_for(state)
+    if validators is None:
+        abort(404)
+    etag, last_modified = validators
+    cached = page_cache.get_current(cache_key, etag) if cacheable else None
+    if cached is not None:
+        return conditional_response(*cached)
+    if client_is_current(etag, last_modified):
+        return conditional_response(etag, last_modified, None)
+
+    limit = app.config['DETAIL_SHOWS_LIMIT']
+    entity, upcoming, past, counts = await async_db.run(
+        lambda: model.query.options(selectinload(model.genres), raiseload('*')).get(entity_id),
+        lambda: loader(entity_id, now, past = False, limit = limit),
+        lambda: loader(entity_id, now, past = True, limit = limit),
+        lambda: show_counts(own_key, entity_id, now)
+    )
+    if not entity:
+        abort(404)
+
+    data = entity.to_dict()
+    data['past_shows_count'], data['upcoming_shows_count'] = counts
+    for when, shows in (('upcoming', upcoming), ('past', past)):
+        data[when + '_shows'] = shows['items']
+        data[when + '_shows_more_link'] = url_for(shows_endpoint, when = when, cursor = shows['next_cursor'], **id_arg) if shows['next_cursor'] else None
+
+    page = render_template(template, **{ kind: data, kind + '_edit_link': url_for(edit_endpoint, **id_arg) })
+    if cacheable:
+        next_show = upcoming['items'][0]['start_time'] if upcoming['items'] else None
+        page_cache.set(cache_key, (etag, last_modified, page), expires_at = next_show)
+    return conditional_response(etag, last_modified, page)
+
+@reads_from_replica
+async def show_venue(venue_id):
+    return await detail_page('venue', venue_id)
+
+@reads_from_replica
+async def show_artist(artist_id):
+    return await detail_page('artist', artist_id)
+
+def init_async_views(app):
+    """
+    Serve these endpoints from the async views; the routes stay as app.py
+    declares them
+    """
+    for view in (venues, artists, shows, show_venue, show_artist):
+        app.view_functions[view.__name__] = view
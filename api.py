@@ -0,0 +1,185 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import json
+from datetime import date, datetime, time, timedelta
+from flask import Blueprint, Response, request, jsonify, abort, stream_with_context
+from sqlalchemy.sql import exists
+from sqlalchemy.orm import selectinload, joinedload, raiseload
+from models import app, db, Venue, Artist, Show
+from genres import genre_registry
+from database import use_replica
+from availability import free_venues, show_duration
+from geo import near_args, venues_near
+
+#----------------------------------------------------------------------------#
+# JSON API
+#----------------------------------------------------------------------------#
+
+api = Blueprint('api', __name__, url_prefix = '/api/v1')
+
+# The API only reads, so every request goes to a replica when there is one
+api.before_request(use_replica)
+
+# Serializers. The model dicts hold Genre objects for the templates; the
+# API sends their slugs.
+
+def venue_json(venue):
+    data = venue.to_dict()
+    data['genres'] = [genre.slug for genre in venue.genres]
+    return data
+
+def artist_json(artist):
+    data = artist.to_dict()
+    data['genres'] = [genre.slug for genre in artist.genres]
+    return data
+
+def show_json(show):
+    data = show.with_venue()
+    data.update(show.with_artist())
+    data['id'] = show.id
+    return data
+
+def stream(query, serialize):
+    """
+    Stream every row of query, fetched API_BATCH_SIZE rows at a time, as
+    NDJSON (?format=ndjson or Accept: application/x-ndjson) or as a
+    {"data": [...]} document sent in chunks
+    """
+    batch_size = app.config['API_BATCH_SIZE']
+    ndjson = request.args.get('format') == 'ndjson' or \
+        request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+
+    def generate():
+        chunk = [] if ndjson else ['{"data": [']
+        for count, row in enumerate(query.yield_per(batch_size)):
+            if ndjson:
+                chunk.append(json.dumps(serialize(row)) + '\n')
+            else:
+                chunk.append((',' if count else '') + json.dumps(serialize(row)))
+            if len(chunk) >= batch_size:
+                yield ''.join(chunk)
+                chunk = []
+        if not ndjson:
+            chunk.append(']}')
+        yield ''.join(chunk)
+
+    mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+    return Response(stream_with_context(generate()), mimetype = mimetype)
+
+def require(model, entity_id):
+    if not db.session.query(exists().where(model.id == entity_id)).scalar():
+        abort(404)
+
+@api.errorhandler(400)
+@api.errorhandler(404)
+def api_error(error):
+    return jsonify({ 'error': error.description }), error.code
+
+# Genres
+
+@api.route('/genres')
+def list_genres():
+    genres = sorted(genre_registry.all(), key = lambda genre: genre.name)
+    return jsonify({ 'data': [{ 'id': genre.id, 'name': genre.name, 'slug': genre.slug } for genre in genres] })
+
+# Venues
+
+@api.route('/venues')
+def list_venues():
+    query = Venue.query.options(
+        selectinload(Venue.genres),
+        raiseload('*')
+    ).order_by(Venue.id)
+    return stream(query, venue_json)
+
+# Venues with nothing booked on a date (?date=2026-11-06), or for a show at
+# a given time that day (&time=20:00), optionally within a state and city
+
+@api.route('/venues/available')
+def list_available_venues():
+    try:
+        day = date.fromisoformat(request.args['date'])
+        at = request.args.get('time')
+        if at:
+            start = datetime.combine(day, time.fromisoformat(at))
+            end = start + show_duration()
+        else:
+            start = datetime.combine(day, time())
+            end = start + timedelta(days = 1)
+    except (KeyError, ValueError):
+        abort(400, 'date (YYYY-MM-DD) is required, time (HH:MM) is optional.')
+    query = free_venues(start, end, request.args.get('state'), request.args.get('city'))
+    return stream(query, lambda venue: { 'id': venue.id, 'name': venue.name, 'city': venue.city, 'state': venue.state })
+
+# Venues within ?radius= km of ?lat=&lng=, nearest first, with their
+# distance in km
+
+@api.route('/venues/near')
+def list_near_venues():
+    try:
+        latitude, longitude, radius = near_args(request.args)
+    except ValueError as error:
+        abort(400, str(error))
+    nearby = venues_near(latitude, longitude, radius, app.config['GEO_NEAR_LIMIT'])
+    return jsonify({ 'data': [dict(venue._asdict(), distance_km = round(distance, 3)) for distance, venue in nearby] })
+
+@api.route('/venues/<int:venue_id>')
+def get_venue(venue_id):
+    venue = Venue.query.options(
+        selectinload(Venue.genres),
+        raiseload('*')
+    ).get(venue_id)
+    if venue is None:
+        abort(404)
+    return jsonify({ 'data': venue_json(venue) })
+
+@api.route('/venues/<int:venue_id>/shows')
+def list_venue_shows(venue_id):
+    require(Venue, venue_id)
+    query = Show.query.options(
+        joinedload(Show.artist),
+        raiseload('*')
+    ).filter(Show.venue_id == venue_id).order_by(Show.start_time, Show.id)
+    return stream(query, lambda show: dict(show.with_artist(), id = show.id))
+
+# Artists
+
+@api.route('/artists')
+def list_artists():
+    query = Artist.query.options(
+        selectinload(Artist.genres),
+        raiseload('*')
+    ).order_by(Artist.id)
+    return stream(query, artist_json)
+
+@api.route('/artists/<int:artist_id>')
+def get_artist(artist_id):
+    artist = Artist.query.options(
+        selectinload(Artist.genres),
+        raiseload('*')
+    ).get(artist_id)
+    if artist is None:
+        abort(404)
+    return jsonify({ 'data': artist_json(artist) })
+
+@api.route('/artists/<int:artist_id>/shows')
+def list_artist_shows(artist_id):
+    require(Artist, artist_id)
+    query = Show.query.options(
+        joinedload(Show.venue),
+        raiseload('*')
+    ).filter(Show.artist_id == artist_id).order_by(Show.start_time, Show.id)
+    return stream(query, lambda show: dict(show.with_venue(), id = show.id))
+
+# Shows
+
+@api.route('/shows')
+def list_shows():
+    query = Show.query.options(
+        joinedload(Show.venue),
+        joinedload(Show.artist),
+        raiseload('*')
+    ).order_by(Show.start_time, Show.id)
+    return stream(query, show_json)
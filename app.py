@@ -3,15 +3,18 @@
 #----------------------------------------------------------------------------#
 
 import babel
+import babel.dates
 import datetime
+import functools
 import dateutil.parser
-from flask import Flask, render_template, request, Response, flash, redirect, url_for, abort
+from flask import Flask, render_template, request, Response, flash, redirect, url_for, abort, jsonify, session
 from flask_migrate import Migrate
 from flask_moment import Moment
 from flask_sqlalchemy import SQLAlchemy
 from flask_wtf import Form
 import json
 from sqlalchemy.sql import exists
+from sqlalchemy.orm import selectinload, raiseload
 import logging
 from logging import Formatter, FileHandler
 import sys, traceback
@@ -26,18 +29,42 @@ app = Flask(__name__)
 # Models need to be imported after app is set up for migrations.
 from models import *
 from forms import *
+from queries import *
+from search import *
+from genres import genre_registry
+from suggest import artist_suggestions, venue_suggestions
+from cache import page_cache, venue_pages, artist_pages, expire_pages
+from conditional import *
+from feed import feed_command, add_to_feed, update_feed_venue, update_feed_artist, remove_venue_from_feed, remove_artist_from_feed
+from profiling import init_profiling
+from database import pool_report, reads_from_replica, reading_from_replica
+from geo import geocode_command, locate_venue, near_args, venues_near
 
 #----------------------------------------------------------------------------#
 # Filters.
 #----------------------------------------------------------------------------#
 
-def format_datetime(value, format='medium'):
-  date = dateutil.parser.parse(value)
-  if format == 'full':
-      format = "EEEE MMMM, d, y 'at' h:mma"
-  elif format == 'medium':
-      format = "EE MM, dd, y h:mma"
-  return babel.dates.format_datetime(date, format)
+DATETIME_FORMATS = {
+  'full': "EEEE MMMM, d, y 'at' h:mma",
+  'medium': "EE MM, dd, y h:mma"
+}
+
+# Formatting still goes through babel.dates.format_datetime, which keeps
+# its handling of time zones; Babel caches parsed patterns itself, and the
+# named format and locale are resolved once per (format, locale) pair.
+
+@functools.lru_cache(maxsize = 64)
+def resolve_datetime_format(format, locale):
+  return DATETIME_FORMATS.get(format, format), babel.Locale.parse(locale or babel.dates.LC_TIME)
+
+def format_datetime(value, format='medium', locale=None):
+  if isinstance(value, str):
+    try:
+      value = datetime.fromisoformat(value)
+    except ValueError:
+      value = dateutil.parser.parse(value)
+  pattern, locale = resolve_datetime_format(format, locale)
+  return babel.dates.format_datetime(value, pattern, locale = locale)
 
 app.jinja_env.filters['datetime'] = format_datetime
 
@@ -45,6 +72,46 @@ app.jinja_env.filters['datetime'] = format_datetime
 # Controllers.
 #----------------------------------------------------------------------------#
 
+# Read ?cursor= and ?limit= for the paginated listing pages
+
+def page_args():
+  cursor = request.args.get('cursor') or None
+  limit = request.args.get('limit', app.config['PAGE_SIZE'], type = int)
+  return cursor, max(1, min(limit, app.config['MAX_PAGE_SIZE']))
+
+def paginate(loader, *args):
+  cursor, limit = page_args()
+  try:
+    return loader(*args, cursor = cursor, limit = limit)
+  except ValueError:
+    abort(400)
+
+# Detail pages are served from the page cache unless caching is off, a
+# flashed message is waiting to be shown on this page, or the page has just
+# changed and this request reads from a replica that may not have the change
+
+def page_cacheable(kind, entity_id):
+  if not app.config['PAGE_CACHE_ENABLED'] or '_flashes' in session:
+    return False
+  return not (reading_from_replica() and page_cache.recently_bumped(kind, entity_id))
+
+# Load one page of a detail page's past or upcoming shows, with a link to
+# the next page for "load more"
+
+def show_section(loader, entity_id, now, when, more_link, cursor = None):
+  try:
+    page = loader(
+      entity_id,
+      now,
+      past = when == 'past',
+      cursor = cursor or None,
+      limit = app.config['DETAIL_SHOWS_LIMIT']
+    )
+  except ValueError:
+    abort(400)
+  page['more_link'] = more_link(when, page['next_cursor']) if page['next_cursor'] else None
+  return page
+
 @app.route('/')
 def index():
   return render_template('pages/home.html')
@@ -56,55 +123,112 @@ def index():
 # Show venues list
 
 @app.route('/venues')
+@reads_from_replica
 def venues():
-  data = []
-  locales = db.session.query(Venue.city, Venue.state).group_by(Venue.city, Venue.state).all()
-  for locale in locales:
-    data.append({
-      'city': locale[0],
-      'state': locale[1],
-      'venues': Venue.query.filter_by(city = locale[0], state = locale[1]).all(),
-      })
-  return render_template('pages/venues.html', areas = data);
+  def render():
+    page = paginate(venue_directory)
+    return render_template('pages/venues.html', areas = page['items'], page = page)
+  return conditional_response(list_etag(Venue), None, render)
 
 # Implement venues search
 
 @app.route('/venues/search', methods = ['POST'])
+@reads_from_replica
 def search_venues():
   search_term = request.form.get('search_term', '')
-  data = Venue.query.filter(Venue.name.ilike('%' + search_term + '%')).all()
+  count, data = find_venues(search_term)
   response = {
-    'count': len(data),
+    'count': count,
     'data': data
   }
   return render_template('pages/search_venues.html', results = response, search_term = search_term)
 
+# Venues near a point: ?lat=&lng=&radius= (km), nearest first. Without a
+# point the page asks the browser for the visitor's location
+
+@app.route('/venues/near')
+@reads_from_replica
+def near_venues():
+  if 'lat' not in request.args and 'lng' not in request.args:
+    return render_template('pages/venues_near.html', venues = None)
+  try:
+    latitude, longitude, radius = near_args(request.args)
+  except ValueError as error:
+    abort(400, str(error))
+  nearby = venues_near(latitude, longitude, radius, app.config['GEO_NEAR_LIMIT'])
+  return render_template(
+    'pages/venues_near.html',
+    venues = [dict(venue._asdict(), distance = distance) for distance, venue in nearby],
+    latitude = latitude,
+    longitude = longitude,
+    radius = radius
+  )
+
 # Show venue page
 
 @app.route('/venues/<int:venue_id>')
+@reads_from_replica
 def show_venue(venue_id):
-  venue = Venue.query.get(venue_id)
+  cacheable = page_cacheable('venue', venue_id)
+  if cacheable:
+    cache_key = page_cache.key('venue', venue_id)
 
-  past_shows = list(filter(lambda x: x.start_time < datetime.today(), venue.shows))
-  upcoming_shows = list(filter(lambda x: x.start_time >= datetime.today(), venue.shows))
-
-  past_shows = list(map(lambda x: x.with_artist(), past_shows))
-  upcoming_shows = list(map(lambda x: x.with_artist(), upcoming_shows))
-
-  data = venue.to_dict()
-  data['upcoming_shows'] = upcoming_shows
-  data['upcoming_shows_count'] = len(upcoming_shows)
-  data['past_shows'] = past_shows
-  data['past_shows_count'] = len(past_shows)
-
-  if venue:
-    return render_template(
+  now = datetime.now()
+  validators = detail_validators(Venue, venue_id, now)
+  if validators is None:
+    abort(404)
+  etag, last_modified = validators
+
+  # A cached page is served while the venue is still in the state it was
+  # rendered from
+  cached = page_cache.get_current(cache_key, etag) if cacheable else None
+  if cached is not None:
+    return conditional_response(*cached)
+
+  def render():
+    venue = Venue.query.options(
+      selectinload(Venue.genres),
+      raiseload('*')
+    ).get(venue_id)
+    if not venue:
+      abort(404)
+
+    more_link = lambda when, cursor: url_for('show_venue_shows', venue_id = venue_id, when = when, cursor = cursor)
+    upcoming_shows = show_section(shows_for_venue, venue_id, now, 'upcoming', more_link)
+    past_shows = show_section(shows_for_venue, venue_id, now, 'past', more_link)
+
+    data = venue.to_dict()
+    data['past_shows_count'], data['upcoming_shows_count'] = show_counts(Show.venue_id, venue_id, now)
+    data['upcoming_shows'] = upcoming_shows['items']
+    data['upcoming_shows_more_link'] = upcoming_shows['more_link']
+    data['past_shows'] = past_shows['items']
+    data['past_shows_more_link'] = past_shows['more_link']
+
+    page = render_template(
       'pages/show_venue.html',
       venue = data,
       venue_edit_link = url_for('edit_venue', venue_id = venue_id)
     )
-  else:
-    abort(404)
+    if cacheable:
+      next_show = upcoming_shows['items'][0]['start_time'] if upcoming_shows['items'] else None
+      page_cache.set(cache_key, (etag, last_modified, page), expires_at = next_show)
+    return page
+
+  return conditional_response(etag, last_modified, render)
+
+# Load more of a venue's past or upcoming shows
+
+@app.route('/venues/<int:venue_id>/shows/<any(past, upcoming):when>')
+@reads_from_replica
+def show_venue_shows(venue_id, when):
+  more_link = lambda when, cursor: url_for('show_venue_shows', venue_id = venue_id, when = when, cursor = cursor)
+  shows = show_section(shows_for_venue, venue_id, datetime.now(), when, more_link, request.args.get('cursor'))
+  return render_template(
+    'pages/show_tiles.html',
+    shows = shows['items'],
+    more_link = shows['more_link'],
+    counterpart = 'artist'
+  )
 
 # Add a new venue
 
@@ -124,9 +248,7 @@ def create_venue_submission():
     return redirect(url_for(['create_venue_submission']))
 
   try:
-    genres = []
-    for genre in form.genres.data:
-      genres.append( Genre.query.get( genre ) )
+    genres = genre_registry.resolve(form.genres.data)
 
     venue = Venue(
       name = form.name.data,
@@ -142,9 +264,12 @@ def create_venue_submission():
       seeking_talent = form.seeking_talent.data,
       seeking_description = form.seeking_description.data
     )
+    locate_venue(venue)
     db.session.add(venue)
     db.session.commit()
     venue_id = venue.id
+    invalidate_search_index()
+    venue_suggestions.put(venue_id, form.name.data)
 
   except:
     error = True
@@ -171,7 +296,10 @@ def create_venue_submission():
 
 @app.route('/venues/<int:venue_id>/edit', methods = ['GET'])
 def edit_venue(venue_id):
-  venue = Venue.query.get(venue_id)
+  venue = Venue.query.options(
+    selectinload(Venue.genres),
+    raiseload('*')
+  ).get(venue_id)
   form = VenueForm(obj=venue)
   genres = []
   for genre in venue.genres:
@@ -189,15 +317,17 @@ def edit_venue_submission(venue_id):
   error = False
   form = VenueForm(request.form)
   try:
-    genres = []
-    for genre in form.genres.data:
-      genres.append( Genre.query.get( genre ))
+    genres = genre_registry.resolve(form.genres.data)
 
-    venue = Venue.query.get(venue_id)
+    venue = Venue.query.options(
+      selectinload(Venue.genres),
+      raiseload('*')
+    ).get(venue_id)
     venue.name = form.name.data
     venue.slug = slugify(venue.name)
     venue.city = form.city.data
     venue.state = form.state.data
+    locate_venue(venue)
     venue.phone = form.phone.data
     venue.genres = genres
     venue.image_link = form.image_link.data
@@ -205,7 +335,12 @@ def edit_venue_submission(venue_id):
     venue.facebook_link = form.facebook_link.data
     venue.seeking_talent = form.seeking_talent.data
     venue.seeking_description = form.seeking_description.data
+    venue.updated_at = datetime.utcnow()
+    update_feed_venue(venue)
     db.session.commit()
+    invalidate_search_index()
+    venue_suggestions.put(venue_id, form.name.data)
+    expire_pages(venue_pages(venue_id))
 
   except:
     error = True
@@ -231,10 +366,16 @@ def edit_venue_submission(venue_id):
 @app.route('/venues/<venue_id>/delete', methods = ['GET'])
 def delete_venue(venue_id):
   try:
+    pages = venue_pages(int(venue_id))
+    touch_pages(pages[1:])
+    remove_venue_from_feed(int(venue_id))
     venue = Venue.query.filter_by(id = venue_id)
     venue.genres = []
     venue.delete()
     db.session.commit()
+    invalidate_search_index()
+    venue_suggestions.discard(int(venue_id))
+    expire_pages(pages)
 
   except:
     error = True
@@ -256,18 +397,22 @@ def delete_venue(venue_id):
 # Show artists list
 
 @app.route('/artists')
+@reads_from_replica
 def artists():
-  data = Artist.query.all()
-  return render_template('pages/artists.html', artists = data)
+  def render():
+    page = paginate(artist_list)
+    return render_template('pages/artists.html', artists = page['items'], page = page)
+  return conditional_response(list_etag(Artist), None, render)
 
 # Search artists
 
 @app.route('/artists/search', methods = ['POST'])
+@reads_from_replica
 def search_artists():
   search_term = request.form.get('search_term', '')
-  data = Artist.query.filter(Artist.name.ilike('%' + search_term + '%')).all()
+  count, data = find_artists(search_term)
   response = {
-    "count": len(data),
+    "count": count,
     "data": data
   }
   return render_template('pages/search_artists.html', results = response, search_term = search_term)
@@ -275,29 +420,68 @@ def search_artists():
 # Show artist page
 
 @app.route('/artists/<int:artist_id>')
+@reads_from_replica
 def show_artist(artist_id):
-  artist = Artist.query.get(artist_id)
+  cacheable = page_cacheable('artist', artist_id)
+  if cacheable:
+    cache_key = page_cache.key('artist', artist_id)
 
-  past_shows = list(filter(lambda x: x.start_time < datetime.today(), artist.shows))
-  upcoming_shows = list(filter(lambda x: x.start_time >= datetime.today(), artist.shows))
-
-  past_shows = list(map(lambda x: x.with_venue(), past_shows))
-  upcoming_shows = list(map(lambda x: x.with_venue(), upcoming_shows))
-
-  data = artist.to_dict()
-  data['upcoming_shows'] = upcoming_shows
-  data['upcoming_shows_count'] = len(upcoming_shows)
-  data['past_shows'] = past_shows
-  data['past_shows_count'] = len(past_shows)
-
-  if artist:
-    return render_template(
+  now = datetime.now()
+  validators = detail_validators(Artist, artist_id, now)
+  if validators is None:
+    abort(404)
+  etag, last_modified = validators
+
+  # A cached page is served while the artist is still in the state it was
+  # rendered from
+  cached = page_cache.get_current(cache_key, etag) if cacheable else None
+  if cached is not None:
+    return conditional_response(*cached)
+
+  def render():
+    artist = Artist.query.options(
+      selectinload(Artist.genres),
+      raiseload('*')
+    ).get(artist_id)
+    if not artist:
+      abort(404)
+
+    more_link = lambda when, cursor: url_for('show_artist_shows', artist_id = artist_id, when = when, cursor = cursor)
+    upcoming_shows = show_section(shows_for_artist, artist_id, now, 'upcoming', more_link)
+    past_shows = show_section(shows_for_artist, artist_id, now, 'past', more_link)
+
+    data = artist.to_dict()
+    data['past_shows_count'], data['upcoming_shows_count'] = show_counts(Show.artist_id, artist_id, now)
+    data['upcoming_shows'] = upcoming_shows['items']
+    data['upcoming_shows_more_link'] = upcoming_shows['more_link']
+    data['past_shows'] = past_shows['items']
+    data['past_shows_more_link'] = past_shows['more_link']
+
+    page = render_template(
       'pages/show_artist.html',
       artist = data,
       artist_edit_link = url_for('edit_artist', artist_id = artist_id)
     )
-  else:
-    abort(404)
+    if cacheable:
+      next_show = upcoming_shows['items'][0]['start_time'] if upcoming_shows['items'] else None
+      page_cache.set(cache_key, (etag, last_modified, page), expires_at = next_show)
+    return page
+
+  return conditional_response(etag, last_modified, render)
+
+# Load more of an artist's past or upcoming shows
+
+@app.route('/artists/<int:artist_id>/shows/<any(past, upcoming):when>')
+@reads_from_replica
+def show_artist_shows(artist_id, when):
+  more_link = lambda when, cursor: url_for('show_artist_shows', artist_id = artist_id, when = when, cursor = cursor)
+  shows = show_section(shows_for_artist, artist_id, datetime.now(), when, more_link, request.args.get('cursor'))
+  return render_template(
+    'pages/show_tiles.html',
+    shows = shows['items'],
+    more_link = shows['more_link'],
+    counterpart = 'venue'
+  )
 
 # Add a new artist
 
@@ -318,9 +502,7 @@ def create_artist_submission():
     flash(form.errors)
     return redirect(url_for(['create_artist_submission']))
   try:
-    genres = []
-    for genre in form.genres.data:
-      genres.append( Genre.query.get( genre ) )
+    genres = genre_registry.resolve(form.genres.data)
 
     artist = Artist(
       name = form.name.data,
@@ -338,6 +520,8 @@ def create_artist_submission():
     db.session.add(artist)
     db.session.commit()
     artist_id = artist.id
+    invalidate_search_index()
+    artist_suggestions.put(artist_id, form.name.data)
 
   except:
     error = True
@@ -364,7 +548,10 @@ def create_artist_submission():
 
 @app.route('/artists/<int:artist_id>/edit', methods = ['GET'])
 def edit_artist(artist_id):
-  artist = Artist.query.get(artist_id)
+  artist = Artist.query.options(
+    selectinload(Artist.genres),
+    raiseload('*')
+  ).get(artist_id)
   form = ArtistForm(obj=artist)
   genres = []
   for genre in artist.genres:
@@ -382,11 +569,12 @@ def edit_artist_submission(artist_id):
   error = False
   form = ArtistForm(request.form)
   try:
-    genres = []
-    for genre in form.genres.data:
-      genres.append( Genre.query.get( genre ) )
+    genres = genre_registry.resolve(form.genres.data)
 
-    artist = Artist.query.get(artist_id)
+    artist = Artist.query.options(
+      selectinload(Artist.genres),
+      raiseload('*')
+    ).get(artist_id)
     artist.name = form.name.data
     artist.slug = slugify(artist.name)
     artist.city = form.city.data
@@ -398,7 +586,12 @@ def edit_artist_submission(artist_id):
     artist.facebook_link = form.facebook_link.data
     artist.seeking_venues = form.seeking_venues.data
     artist.seeking_description = form.seeking_description.data
+    artist.updated_at = datetime.utcnow()
+    update_feed_artist(artist)
     db.session.commit()
+    invalidate_search_index()
+    artist_suggestions.put(artist_id, form.name.data)
+    expire_pages(artist_pages(artist_id))
 
   except:
     error = True
@@ -424,10 +617,16 @@ def edit_artist_submission(artist_id):
 @app.route('/artists/<artist_id>/delete', methods = ['GET'])
 def delete_artist(artist_id):
   try:
+    pages = artist_pages(int(artist_id))
+    touch_pages(pages[1:])
+    remove_artist_from_feed(int(artist_id))
     artist = Artist.query.filter_by(id=artist_id)
     artist.genres = []
     artist.delete()
     db.session.commit()
+    invalidate_search_index()
+    artist_suggestions.discard(int(artist_id))
+    expire_pages(pages)
 
   except:
     error = True
@@ -447,21 +646,13 @@ def delete_artist(artist_id):
 #  ----------------------------------------------------------------
 
 @app.route('/shows')
+@reads_from_replica
 def shows():
   today = datetime(datetime.today().year, datetime.today().month, datetime.today().day)
-  shows = Show.query.filter(Show.start_time >= today).all()
-  data = []
-  for show in shows:
-    data.append({
-      'venue_id': show.venue_id,
-      'venue_name': show.venue.name,
-      'venue_image_link': show.venue.image_link,
-      'artist_id': show.artist_id,
-      'artist_name': show.artist.name,
-      'artist_image_link': show.artist.image_link,
-      'start_time': show.start_time.isoformat()
-    })
-  return render_template('pages/shows.html', shows = data)
+  def render():
+    page = paginate(upcoming_shows, today)
+    return render_template('pages/shows.html', shows = page['items'], page = page)
+  return conditional_response(upcoming_shows_etag(today), None, render)
 
 @app.route('/shows/create')
 def create_shows():
@@ -472,6 +663,11 @@ def create_shows():
 def create_show_submission():
   error = False
   form = ShowForm(request.form)
+
+  if not form.validate():
+    flash(form.errors)
+    return redirect(url_for('create_shows'))
+
   try:
     show = Show(
       artist_id = form.artist_id.data,
@@ -479,7 +675,10 @@ def create_show_submission():
       start_time = form.start_time.data
     )
     db.session.add(show)
+    db.session.flush()
+    add_to_feed([show.id])
     db.session.commit()
+    expire_pages([('venue', form.venue_id.data), ('artist', form.artist_id.data)])
 
   except:
     error = True
@@ -501,6 +700,110 @@ def create_show_submission():
 
   return redirect(url_for('shows'))
 
+# Create a tour or residency: many shows for one artist at once. Every slot
+# is validated in one pass and the shows go in with one bulk insert, or the
+# form comes back with what is wrong with each slot.
+
+@app.route('/shows/create/batch', methods = ['GET'])
+def create_show_batch_form():
+  form = ShowBatchForm()
+  return render_template('forms/new_show_batch.html', form = form)
+
+@app.route('/shows/create/batch', methods = ['POST'])
+def create_show_batch_submission():
+  form = ShowBatchForm(request.form)
+
+  if not form.validate():
+    db.session.rollback()
+    return render_template('forms/new_show_batch.html', form = form), 422
+
+  error = False
+  artist_id = form.artist_id.data
+  venue_ids = sorted({ venue_id for venue_id, _ in form.slots })
+  try:
+    rows = [
+      { 'artist_id': artist_id, 'venue_id': venue_id, 'start_time': start_time }
+      for venue_id, start_time in form.slots
+    ]
+    # One INSERT ... RETURNING on Postgres; elsewhere a flush, which also
+    # gives back the new ids
+    if db.engine.dialect.name == 'postgresql':
+      show_ids = db.session.execute(Show.__table__.insert().values(rows).returning(Show.__table__.c.id)).scalars().all()
+    else:
+      shows = [Show(**row) for row in rows]
+      db.session.add_all(shows)
+      db.session.flush()
+      show_ids = [show.id for show in shows]
+    add_to_feed(show_ids)
+    db.session.commit()
+    expire_pages([('artist', artist_id)] + [('venue', venue_id) for venue_id in venue_ids])
+
+  except:
+    error = True
+    db.session.rollback()
+    exc_type, exc_value, exc_traceback = sys.exc_info()
+
+    print("*** print_exception:")
+    traceback.print_exception(exc_type, exc_value, exc_traceback, limit = 2, file = sys.stdout)
+
+  finally:
+    db.session.close()
+
+  if not error:
+    flash('%d shows were successfully listed!' % len(form.slots))
+
+  else:
+    flash('An error occurred. Shows could not be listed.')
+    abort(500)
+
+  return redirect(url_for('shows'))
+
+#  ----------------------------------------------------------------
+#  Typeahead
+#  ----------------------------------------------------------------
+
+# Suggest artists and venues by name prefix for the show form
+
+@app.route('/api/artists/suggest')
+@reads_from_replica
+def suggest_artists():
+  query = request.args.get('q', '')
+  limit = max(1, min(request.args.get('limit', 10, type = int), 50))
+  return jsonify({ 'data': artist_suggestions.suggest(query, limit) })
+
+@app.route('/api/venues/suggest')
+@reads_from_replica
+def suggest_venues():
+  query = request.args.get('q', '')
+  limit = max(1, min(request.args.get('limit', 10, type = int), 50))
+  return jsonify({ 'data': venue_suggestions.suggest(query, limit) })
+
+#  ----------------------------------------------------------------
+#  JSON API
+#  ----------------------------------------------------------------
+
+from api import api
+app.register_blueprint(api)
+
+#  ----------------------------------------------------------------
+#  Async views
+#  ----------------------------------------------------------------
+
+if app.config['ASYNC_VIEWS']:
+  from aio import init_async_views
+  init_async_views(app)
+
+#----------------------------------------------------------------------------#
+# Commands
+#----------------------------------------------------------------------------#
+
+from importer import import_command
+from exporter import export_command
+app.cli.add_command(import_command)
+app.cli.add_command(export_command)
+app.cli.add_command(feed_command)
+app.cli.add_command(geocode_command)
+
 #----------------------------------------------------------------------------#
 # Error handlers
 #----------------------------------------------------------------------------#
@@ -523,6 +826,11 @@ if not app.debug:
     app.logger.addHandler(file_handler)
     app.logger.info('errors')
 
+if app.config['SQL_PROFILING']:
+    init_profiling(app)
+
+app.logger.info(pool_report(app, db))
+
 #----------------------------------------------------------------------------#
 # Launch.
 #----------------------------------------------------------------------------#
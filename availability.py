@@ -0,0 +1,140 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import bisect
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy import exists, func, or_
+from models import app, db, Venue, Show
+
+#----------------------------------------------------------------------------#
+# Availability
+#----------------------------------------------------------------------------#
+
+# A show occupies its venue and artist from start_time for
+# SHOW_DURATION_MINUTES. Every show lasts the same time, so two shows
+# overlap exactly when their start times are less than one duration apart:
+# finding a clash is a range seek on the (venue_id, start_time) or
+# (artist_id, start_time) index, O(log n) in the number of shows, and no
+# interval structure is needed on top of those indexes.
+
+def show_duration():
+    return timedelta(minutes = app.config['SHOW_DURATION_MINUTES'])
+
+def lock_bookings(venue_ids = (), artist_ids = ()):
+    """
+    On Postgres, hold a transaction-level advisory lock on each venue and
+    artist being booked, so two requests cannot both see a slot free and
+    both take it. Locks are taken in a fixed order and released on commit
+    or rollback
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return
+    # Two-key advisory locks: 1 is the venue namespace, 2 the artist one
+    for namespace, ids in ((1, venue_ids), (2, artist_ids)):
+        for entity_id in sorted(set(ids)):
+            db.session.execute(func.pg_advisory_xact_lock(namespace, entity_id))
+
+def booking_conflicts(venue_id, artist_id, start_time, exclude_show_id = None):
+    """
+    Shows that overlap a show of this artist at this venue starting at
+    start_time, as (show id, venue id, artist id, start time) rows
+    """
+    window = show_duration()
+    query = db.session.query(
+        Show.id,
+        Show.venue_id,
+        Show.artist_id,
+        Show.start_time
+    ).filter(
+        or_(Show.venue_id == venue_id, Show.artist_id == artist_id),
+        Show.start_time > start_time - window,
+        Show.start_time < start_time + window
+    )
+    if exclude_show_id is not None:
+        query = query.filter(Show.id != exclude_show_id)
+    return query.order_by(Show.start_time, Show.id).all()
+
+def describe_conflict(conflict, venue_id):
+    what = 'The venue' if conflict.venue_id == venue_id else 'The artist'
+    return '%s is already booked for a show at %s.' % (what, conflict.start_time.strftime('%Y-%m-%d %H:%M'))
+
+def slot_conflicts(artist_id, slots):
+    """
+    Check a batch of shows for one artist, given as (venue_id, start_time)
+    slots, against the existing shows and against each other. One query
+    loads the shows of the artist and the venues around the batch; returns
+    a list of error messages per slot
+    """
+    if not slots:
+        return []
+    window = show_duration()
+    starts = [start_time for _, start_time in slots]
+    existing = db.session.query(
+        Show.id,
+        Show.venue_id,
+        Show.artist_id,
+        Show.start_time
+    ).filter(
+        or_(Show.venue_id.in_({venue_id for venue_id, _ in slots}), Show.artist_id == artist_id),
+        Show.start_time > min(starts) - window,
+        Show.start_time < max(starts) + window
+    ).order_by(Show.start_time, Show.id).all()
+
+    # Start times sorted per venue and for the artist, searched by bisection
+    by_venue = defaultdict(list)
+    by_artist = []
+    for show in existing:
+        if show.artist_id == artist_id:
+            by_artist.append(show)
+        else:
+            by_venue[show.venue_id].append(show)
+    artist_starts = [show.start_time for show in by_artist]
+    venue_starts = { venue_id: [show.start_time for show in shows] for venue_id, shows in by_venue.items() }
+
+    def overlapping(items, keys, start_time):
+        return items[bisect.bisect_right(keys, start_time - window):bisect.bisect_left(keys, start_time + window)]
+
+    # Every slot is the same artist's, so slots clash when they are closer
+    # than one show apart, whatever their venues
+    order = sorted(range(len(slots)), key = lambda index: starts[index])
+    sorted_starts = [starts[index] for index in order]
+
+    errors = []
+    for index, (venue_id, start_time) in enumerate(slots):
+        clashes = overlapping(by_artist, artist_starts, start_time) + overlapping(by_venue[venue_id], venue_starts.get(venue_id, []), start_time)
+        messages = [
+            describe_conflict(show, venue_id)
+            for show in sorted(clashes, key = lambda show: (show.start_time, show.id))
+        ]
+        messages += [
+            'Overlaps show %d of this batch.' % (other + 1)
+            for other in sorted(overlapping(order, sorted_starts, start_time)) if other != index
+        ]
+        errors.append(messages)
+    return errors
+
+def free_venues(start, end, state = None, city = None):
+    """
+    Query for the venues (id, name, city, state) with no show overlapping
+    [start, end), ordered like the venue directory. Each venue is checked
+    with one seek on its own shows, so the cost follows the number of
+    venues in the area, not the number of shows
+    """
+    busy = exists().where(
+        Show.venue_id == Venue.id,
+        Show.start_time > start - show_duration(),
+        Show.start_time < end
+    )
+    query = db.session.query(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state
+    ).filter(~busy)
+    if state:
+        query = query.filter(Venue.state == state)
+    if city:
+        query = query.filter(Venue.city == city)
+    return query.order_by(Venue.state, Venue.city, Venue.name, Venue.id)
@@ -0,0 +1,56 @@
+#----------------------------------------------------------------------------#
+# datetime filter micro-benchmark
+#----------------------------------------------------------------------------#
+
+"""
+Compare the per-call cost of the Jinja `datetime` filter before and after
+the fast path: the old filter re-parsed an isoformat() string with dateutil
+and let Babel rebuild its pattern on every call.
+
+    python benchmarks/datetime_filter.py
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+import babel.dates
+import dateutil.parser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import format_datetime
+
+# The filter as it was, for comparison
+def format_datetime_before(value, format='medium'):
+  date = dateutil.parser.parse(value)
+  if format == 'full':
+      format = "EEEE MMMM, d, y 'at' h:mma"
+  elif format == 'medium':
+      format = "EE MM, dd, y h:mma"
+  return babel.dates.format_datetime(date, format)
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type = int, default = 20000)
+    args = parser.parse_args()
+
+    start = datetime(2035, 4, 1, 20, 0)
+    values = [start + timedelta(hours = i) for i in range(500)]
+    strings = [value.isoformat() for value in values]
+
+    cases = [
+        ('before: isoformat string, dateutil', lambda: [format_datetime_before(s, 'full') for s in strings]),
+        ('after: isoformat string', lambda: [format_datetime(s, 'full') for s in strings]),
+        ('after: datetime object', lambda: [format_datetime(v, 'full') for v in values]),
+    ]
+    assert format_datetime_before(strings[0], 'full') == format_datetime(values[0], 'full')
+
+    repeat = max(1, args.calls // len(values))
+    for name, case in cases:
+        seconds = min(timeit.repeat(case, number = repeat, repeat = 3))
+        print('%-38s %8.2f us/call' % (name, seconds / (repeat * len(values)) * 1e6))
+
+if __name__ == '__main__':
+    main()
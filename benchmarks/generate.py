@@ -0,0 +1,194 @@
+#----------------------------------------------------------------------------#
+# Synthetic catalogue generator
+#----------------------------------------------------------------------------#
+
+"""
+Write a seeded synthetic catalogue shaped like the records in dummydata.py,
+at any size, as a snapshot directory that `flask import snapshot` loads:
+
+    python benchmarks/generate.py /tmp/fyyur-large --artists 100000 --venues 50000 --shows 5000000
+    FLASK_APP=app flask import snapshot /tmp/fyyur-large
+
+Cities follow a Zipf distribution (a few big music cities hold most venues
+and artists), genres are drawn from the seeded genre list with a similar
+skew, and shows favour popular artists and venues. Records are written as
+they are generated, so memory use only grows with the number of artists and
+venues, never with the number of shows. The same --seed produces the same
+catalogue, with show dates laid out around the day it runs.
+"""
+
+import argparse
+import bisect
+import gzip
+import itertools
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+# Genre names as seeded by migration d921f2d9c196
+GENRES = [
+    'Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk',
+    'Funk', 'Hip-Hop', 'Heavy Metal', 'Instrumental', 'Jazz',
+    'Musical Theatre', 'Pop', 'Punk', 'R&B', 'Reggae', 'Rock n Roll',
+    'Soul', 'Other'
+]
+
+CITIES = [
+    ('New York', 'NY'), ('Los Angeles', 'CA'), ('Chicago', 'IL'), ('Nashville', 'TN'),
+    ('Austin', 'TX'), ('San Francisco', 'CA'), ('New Orleans', 'LA'), ('Seattle', 'WA'),
+    ('Atlanta', 'GA'), ('Portland', 'OR'), ('Denver', 'CO'), ('Detroit', 'MI'),
+    ('Philadelphia', 'PA'), ('Boston', 'MA'), ('Minneapolis', 'MN'), ('Memphis', 'TN'),
+    ('Miami', 'FL'), ('Oakland', 'CA'), ('Houston', 'TX'), ('Phoenix', 'AZ'),
+    ('Kansas City', 'MO'), ('Cleveland', 'OH'), ('Pittsburgh', 'PA'), ('Baltimore', 'MD'),
+    ('Salt Lake City', 'UT'), ('Albuquerque', 'NM'), ('Boise', 'ID'), ('Omaha', 'NE'),
+    ('Louisville', 'KY'), ('Richmond', 'VA'), ('Burlington', 'VT'), ('Anchorage', 'AK'),
+]
+
+# Image links used by the dummydata.py records
+ARTIST_IMAGES = [
+    'https://images.unsplash.com/photo-1549213783-8284d0336c4f?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=300&q=80',
+    'https://images.unsplash.com/photo-1495223153807-b916f75de8c5?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=334&q=80',
+    'https://images.unsplash.com/photo-1558369981-f9ca78462e61?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=794&q=80',
+]
+VENUE_IMAGES = [
+    'https://images.unsplash.com/photo-1543900694-133f37abaaa5?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=400&q=60',
+    'https://images.unsplash.com/photo-1497032205916-ac775f0649ae?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=750&q=80',
+    'https://images.unsplash.com/photo-1485686531765-ba63b07845a7?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=747&q=80',
+]
+
+ADJECTIVES = [
+    'Wild', 'Musical', 'Dueling', 'Electric', 'Velvet', 'Golden', 'Blue', 'Midnight',
+    'Rusty', 'Silver', 'Lonely', 'Neon', 'Crimson', 'Hollow', 'Brass', 'Painted',
+]
+NOUNS = [
+    'Sax', 'Petals', 'Pianos', 'Owls', 'Rivers', 'Foxes', 'Strings', 'Lanterns',
+    'Drums', 'Sparrows', 'Engines', 'Wolves', 'Horns', 'Comets', 'Ghosts', 'Tides',
+]
+VENUE_KINDS = ['Hop', 'Bar', 'Live Music & Coffee', 'Hall', 'Lounge', 'Club', 'Theatre', 'Room']
+STREETS = ['Folsom Street', 'Delancey Street', 'Whiskey Moore Ave', 'Main Street', 'Market Street', 'Broadway']
+
+def zipf_weights(count, exponent = 1.1):
+    return list(itertools.accumulate(1.0 / (rank ** exponent) for rank in range(1, count + 1)))
+
+def pick(rng, cumulative):
+    """Index drawn from cumulative (accumulated) weights"""
+    return bisect.bisect(cumulative, rng.random() * cumulative[-1])
+
+def slug(text):
+    return ''.join(c for c in text.lower() if c.isalnum())
+
+def phone(rng):
+    return '%03d-%03d-%04d' % (rng.randint(200, 999), rng.randint(100, 999), rng.randint(0, 9999))
+
+def genres(rng, genre_weights):
+    chosen = set()
+    for _ in range(rng.choice([1, 1, 2, 2, 3, 4, 5])):
+        chosen.add(GENRES[pick(rng, genre_weights)])
+    return sorted(chosen)
+
+def artist_record(rng, artist_id, city_weights, genre_weights):
+    city, state = CITIES[pick(rng, city_weights)]
+    name = 'The %s %s %d' % (rng.choice(ADJECTIVES), rng.choice(NOUNS), artist_id)
+    seeking = rng.random() < 0.3
+    return {
+        'id': artist_id,
+        'name': name,
+        'genres': genres(rng, genre_weights),
+        'city': city,
+        'state': state,
+        'phone': phone(rng),
+        'website': 'https://www.%sband.com' % slug(name),
+        'facebook_link': 'https://www.facebook.com/%s' % slug(name),
+        'seeking_venues': seeking,
+        'seeking_description': 'Looking for shows to perform at in the %s area!' % city if seeking else None,
+        'image_link': rng.choice(ARTIST_IMAGES),
+    }
+
+def venue_record(rng, venue_id, city_weights, genre_weights):
+    city, state = CITIES[pick(rng, city_weights)]
+    name = 'The %s %s %d' % (rng.choice(ADJECTIVES), rng.choice(VENUE_KINDS), venue_id)
+    seeking = rng.random() < 0.4
+    return {
+        'id': venue_id,
+        'name': name,
+        'genres': genres(rng, genre_weights),
+        'address': '%d %s' % (rng.randint(1, 9999), rng.choice(STREETS)),
+        'city': city,
+        'state': state,
+        'phone': phone(rng),
+        'website': 'https://www.%s.com' % slug(name),
+        'facebook_link': 'https://www.facebook.com/%s' % slug(name),
+        'seeking_talent': seeking,
+        'seeking_description': 'We are on the lookout for a local artist to play every two weeks. Please call us.' if seeking else None,
+        'image_link': rng.choice(VENUE_IMAGES),
+    }
+
+def write(directory, name, records):
+    started = time.perf_counter()
+    count = 0
+    with gzip.open(os.path.join(directory, name + '.ndjson.gz'), 'wt', encoding = 'utf-8', compresslevel = 1) as file:
+        for record in records:
+            file.write(json.dumps(record, separators = (',', ':')))
+            file.write('\n')
+            count += 1
+    print('%s: %d records in %.1fs' % (name, count, time.perf_counter() - started))
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory')
+    parser.add_argument('--artists', type = int, default = 1000)
+    parser.add_argument('--venues', type = int, default = 500)
+    parser.add_argument('--shows', type = int, default = 50000)
+    parser.add_argument('--seed', type = int, default = 1)
+    parser.add_argument('--start-id', type = int, default = 1, help = 'First id of each table, to load into a non-empty database')
+    parser.add_argument('--past-days', type = int, default = 730, help = 'Shows start up to this many days ago')
+    parser.add_argument('--future-days', type = int, default = 365, help = 'and up to this many days ahead')
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok = True)
+    rng = random.Random(args.seed)
+    city_weights = zipf_weights(len(CITIES))
+    genre_weights = zipf_weights(len(GENRES), 0.8)
+
+    artist_ids = range(args.start_id, args.start_id + args.artists)
+    venue_ids = range(args.start_id, args.start_id + args.venues)
+    write(args.directory, 'artists', (artist_record(rng, i, city_weights, genre_weights) for i in artist_ids))
+    write(args.directory, 'venues', (venue_record(rng, i, city_weights, genre_weights) for i in venue_ids))
+
+    # Popularity is a Zipf rank over a shuffled id order, so the busiest
+    # artists and venues are spread across the id range
+    artist_order = list(artist_ids)
+    venue_order = list(venue_ids)
+    rng.shuffle(artist_order)
+    rng.shuffle(venue_order)
+    artist_weights = zipf_weights(len(artist_order), 0.8)
+    venue_weights = zipf_weights(len(venue_order), 0.8)
+    today = datetime.now().replace(hour = 0, minute = 0, second = 0, microsecond = 0)
+    first_day = today - timedelta(days = args.past_days)
+    days = args.past_days + args.future_days
+
+    def shows():
+        for show_id in range(args.start_id, args.start_id + args.shows):
+            start_time = first_day + timedelta(days = rng.randrange(days), minutes = rng.choice(range(19 * 60, 23 * 60, 30)))
+            yield {
+                'id': show_id,
+                'artist_id': artist_order[pick(rng, artist_weights)],
+                'venue_id': venue_order[pick(rng, venue_weights)],
+                'start_time': start_time.isoformat(),
+            }
+
+    write(args.directory, 'shows', shows())
+
+    with open(os.path.join(args.directory, 'manifest.json'), 'w') as file:
+        json.dump({
+            'created_at': datetime.utcnow().isoformat(),
+            'format': 'ndjson.gz',
+            'generator': vars(args),
+            'counts': { 'artists': args.artists, 'venues': args.venues, 'shows': args.shows }
+        }, file, indent = 2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+#----------------------------------------------------------------------------#
+# Index benchmark
+#----------------------------------------------------------------------------#
+
+"""
+Seed a scratch database with a large synthetic catalogue and compare the
+query plans and timings of the app's hot queries before and after the
+lookup indexes added in migration 31d937ec8daa.
+
+    python benchmarks/indexes.py --database-url postgresql://localhost/fyyur_bench
+
+The tables are created from scratch, so point it at an empty database (or
+pass --reset to drop the benchmark tables first). Defaults to a SQLite file.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import (
+    create_engine, text, MetaData, Table, Column, Integer, String, DateTime,
+    ForeignKey, Index
+)
+
+metadata = MetaData()
+
+genre = Table('Genre', metadata,
+    Column('id', Integer, primary_key = True),
+    Column('name', String, nullable = False),
+    Column('slug', String, unique = True, nullable = False)
+)
+
+venue = Table('Venue', metadata,
+    Column('id', Integer, primary_key = True),
+    Column('name', String),
+    Column('city', String(120)),
+    Column('state', String(120)),
+    Column('image_link', String(500))
+)
+
+artist = Table('Artist', metadata,
+    Column('id', Integer, primary_key = True),
+    Column('name', String),
+    Column('city', String(120)),
+    Column('state', String(120)),
+    Column('image_link', String(500))
+)
+
+show = Table('Show', metadata,
+    Column('id', Integer, primary_key = True),
+    Column('start_time', DateTime, nullable = False),
+    Column('artist_id', Integer, ForeignKey('Artist.id', ondelete = 'cascade')),
+    Column('venue_id', Integer, ForeignKey('Venue.id', ondelete = 'cascade'))
+)
+
+venue_genre = Table('venue_genre_relationship', metadata,
+    Column('genre_id', Integer, ForeignKey('Genre.id')),
+    Column('venue_id', Integer, ForeignKey('Venue.id', ondelete = 'cascade')),
+    Column('id', Integer, primary_key = True)
+)
+
+artist_genre = Table('artist_genre_relationship', metadata,
+    Column('genre_id', Integer, ForeignKey('Genre.id')),
+    Column('artist_id', Integer, ForeignKey('Artist.id', ondelete = 'cascade')),
+    Column('id', Integer, primary_key = True)
+)
+
+# Same definitions as migration 31d937ec8daa. Built on demand: an Index
+# attaches itself to its table, and the tables must first be created bare.
+
+def lookup_indexes():
+    return [
+        Index('ix_show_venue_id_start_time', show.c.venue_id, show.c.start_time, show.c.id),
+        Index('ix_show_artist_id_start_time', show.c.artist_id, show.c.start_time, show.c.id),
+        Index('ix_show_start_time', show.c.start_time, show.c.id),
+        Index('ix_venue_state_city', venue.c.state, venue.c.city, venue.c.name, venue.c.id),
+        Index('ix_artist_name', artist.c.name, artist.c.id),
+        Index('ix_venue_genre_venue_id', venue_genre.c.venue_id, venue_genre.c.genre_id),
+        Index('ix_venue_genre_genre_id', venue_genre.c.genre_id),
+        Index('ix_artist_genre_artist_id', artist_genre.c.artist_id, artist_genre.c.genre_id),
+        Index('ix_artist_genre_genre_id', artist_genre.c.genre_id),
+    ]
+
+GENRES = [
+    'Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk',
+    'Funk', 'Hip-Hop', 'Heavy Metal', 'Instrumental', 'Jazz',
+    'Musical Theatre', 'Pop', 'Punk', 'R&B', 'Reggae', 'Rock n Roll',
+    'Soul', 'Other'
+]
+
+# The app's hot read queries, in the shape queries.py issues them
+QUERIES = {
+    'upcoming shows page': '''
+        SELECT "Show".id, "Show".start_time, "Venue".name, "Artist".name
+        FROM "Show"
+        JOIN "Venue" ON "Venue".id = "Show".venue_id
+        JOIN "Artist" ON "Artist".id = "Show".artist_id
+        WHERE "Show".start_time >= :now
+        ORDER BY "Show".start_time, "Show".id
+        LIMIT 51''',
+    'venue show counts': '''
+        SELECT count(*) FILTER (WHERE start_time < :now),
+               count(*) FILTER (WHERE start_time >= :now)
+        FROM "Show" WHERE venue_id = :venue_id''',
+    'venue upcoming shows': '''
+        SELECT "Show".id, "Show".start_time, "Artist".name
+        FROM "Show" JOIN "Artist" ON "Artist".id = "Show".artist_id
+        WHERE "Show".venue_id = :venue_id AND "Show".start_time >= :now
+        ORDER BY "Show".start_time, "Show".id
+        LIMIT 11''',
+    'artist past shows': '''
+        SELECT "Show".id, "Show".start_time, "Venue".name
+        FROM "Show" JOIN "Venue" ON "Venue".id = "Show".venue_id
+        WHERE "Show".artist_id = :artist_id AND "Show".start_time < :now
+        ORDER BY "Show".start_time DESC, "Show".id DESC
+        LIMIT 11''',
+    'venue directory page': '''
+        SELECT id, name, city, state FROM "Venue"
+        ORDER BY state, city, name, id
+        LIMIT 51''',
+    'artist list page': '''
+        SELECT id, name FROM "Artist"
+        ORDER BY name, id
+        LIMIT 51''',
+    'venue genres': '''
+        SELECT "Genre".id, "Genre".name FROM "Genre"
+        JOIN venue_genre_relationship ON "Genre".id = venue_genre_relationship.genre_id
+        WHERE venue_genre_relationship.venue_id = :venue_id''',
+}
+
+def seed(connection, venues, artists, shows, batch_size = 10000):
+    rng = random.Random(1)
+    cities = [('City %d' % i, 'ST%d' % (i % 50)) for i in range(max(1, venues // 40))]
+
+    connection.execute(genre.insert(), [
+        { 'id': i + 1, 'name': name, 'slug': name.lower() } for i, name in enumerate(GENRES)
+    ])
+    connection.execute(venue.insert(), [{
+        'id': i,
+        'name': 'Venue %07d' % rng.randrange(10 ** 7),
+        'city': cities[i % len(cities)][0],
+        'state': cities[i % len(cities)][1],
+        'image_link': 'https://example.com/venues/%d.jpg' % i
+    } for i in range(1, venues + 1)])
+    connection.execute(artist.insert(), [{
+        'id': i,
+        'name': 'Artist %07d' % rng.randrange(10 ** 7),
+        'city': cities[i % len(cities)][0],
+        'state': cities[i % len(cities)][1],
+        'image_link': 'https://example.com/artists/%d.jpg' % i
+    } for i in range(1, artists + 1)])
+    connection.execute(venue_genre.insert(), [
+        { 'venue_id': i, 'genre_id': rng.randint(1, len(GENRES)) } for i in range(1, venues + 1)
+    ])
+    connection.execute(artist_genre.insert(), [
+        { 'artist_id': i, 'genre_id': rng.randint(1, len(GENRES)) } for i in range(1, artists + 1)
+    ])
+
+    start = datetime.now() - timedelta(days = 3650)
+    for offset in range(0, shows, batch_size):
+        connection.execute(show.insert(), [{
+            'venue_id': rng.randint(1, venues),
+            'artist_id': rng.randint(1, artists),
+            'start_time': start + timedelta(minutes = rng.randrange(60 * 24 * 3650 + 60 * 24 * 365))
+        } for _ in range(min(batch_size, shows - offset))])
+
+def explain(connection, sql, params):
+    if connection.dialect.name == 'postgresql':
+        rows = connection.execute(text('EXPLAIN ' + sql), params)
+    else:
+        rows = connection.execute(text('EXPLAIN QUERY PLAN ' + sql), params)
+    return '\n'.join('    ' + ' '.join(str(value) for value in row[-1:]) for row in rows)
+
+def measure(connection, params, repeat):
+    results = {}
+    for name, sql in QUERIES.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            connection.execute(text(sql), params).fetchall()
+            timings.append(time.perf_counter() - started)
+        results[name] = (statistics.median(timings), explain(connection, sql, params))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default = 'sqlite:///benchmark.db')
+    parser.add_argument('--venues', type = int, default = 50000)
+    parser.add_argument('--artists', type = int, default = 100000)
+    parser.add_argument('--shows', type = int, default = 1000000)
+    parser.add_argument('--repeat', type = int, default = 5)
+    parser.add_argument('--reset', action = 'store_true', help = 'drop the benchmark tables first')
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    if args.reset:
+        metadata.drop_all(engine)
+    metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        print('Seeding %d venues, %d artists, %d shows...' % (args.venues, args.artists, args.shows))
+        seed(connection, args.venues, args.artists, args.shows)
+
+    params = {
+        'now': datetime.now(),
+        'venue_id': args.venues // 2,
+        'artist_id': args.artists // 2
+    }
+    with engine.begin() as connection:
+        before = measure(connection, params, args.repeat)
+        for index in lookup_indexes():
+            index.create(connection)
+        connection.execute(text('ANALYZE'))
+        after = measure(connection, params, args.repeat)
+
+    for name in QUERIES:
+        (before_time, before_plan), (after_time, after_plan) = before[name], after[name]
+        print('\n%s: %.2f ms -> %.2f ms (%.1fx)' % (
+            name, before_time * 1000, after_time * 1000, before_time / max(after_time, 1e-9)
+        ))
+        print('  before:\n' + before_plan)
+        print('  after:\n' + after_plan)
+
+if __name__ == '__main__':
+    main()
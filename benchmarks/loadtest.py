@@ -0,0 +1,144 @@
+#----------------------------------------------------------------------------#
+# Load test
+#----------------------------------------------------------------------------#
+
+"""
+Replay a weighted mix of requests against the app in-process through
+app.test_client() and report, per route, p50/p95/p99 latency and the
+number of SQL statements each request ran.
+
+    python benchmarks/loadtest.py --requests 5000
+    python benchmarks/loadtest.py --workload my_workload.jsonl --database-url postgresql://localhost/fyyur_large
+
+The workload is JSON lines, one request kind per line (see
+benchmarks/workload.jsonl):
+
+    {"name": "venue page", "method": "GET", "path": "/venues/{venue_id}", "weight": 20}
+    {"name": "venue search", "method": "POST", "path": "/venues/search", "data": {"search_term": "{term}"}, "weight": 5}
+
+{venue_id} and {artist_id} are filled with ids from the database, {term}
+with a word from a venue or artist name and {prefix} with the start of one.
+Load a large catalogue first, e.g. with benchmarks/generate.py.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKLOAD = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'workload.jsonl')
+
+def read_workload(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def percentile(values, percent):
+    """Nearest-rank percentile of sorted values"""
+    return values[max(0, math.ceil(percent / 100.0 * len(values)) - 1)]
+
+def fill(template, values):
+    if isinstance(template, dict):
+        return { key: fill(value, values) for key, value in template.items() }
+    return template.format(**values) if isinstance(template, str) else template
+
+def sample_catalogue(app, size):
+    """
+    Ids and names of up to size random venues and artists, and the words in
+    their names, to fill workload templates with
+    """
+    from models import db, Venue, Artist
+    with app.app_context():
+        venues = db.session.query(Venue.id, Venue.name).order_by(db.func.random()).limit(size).all()
+        artists = db.session.query(Artist.id, Artist.name).order_by(db.func.random()).limit(size).all()
+        db.session.remove()
+    if not venues or not artists:
+        sys.exit('The database has no venues or artists; load a catalogue first.')
+    words = [word for _, name in venues + artists for word in (name or '').split() if len(word) > 2]
+    return venues, artists, words
+
+def request_values(rng, catalogue):
+    venues, artists, words = catalogue
+    word = rng.choice(words)
+    return {
+        'venue_id': rng.choice(venues).id,
+        'artist_id': rng.choice(artists).id,
+        'term': word,
+        'prefix': word[:rng.randint(1, min(4, len(word)))],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workload', default = WORKLOAD)
+    parser.add_argument('--requests', type = int, default = 2000)
+    parser.add_argument('--warmup', type = int, default = 100, help = 'Requests sent before measuring')
+    parser.add_argument('--seed', type = int, default = 1)
+    parser.add_argument('--sample', type = int, default = 10000, help = 'Ids and names sampled from each table')
+    parser.add_argument('--database-url', help = 'Overrides DATABASE_URL')
+    parser.add_argument('--no-page-cache', action = 'store_true', help = 'Render every venue and artist page')
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    from app import app
+    from models import db
+    if args.no_page_cache:
+        app.config['PAGE_CACHE_ENABLED'] = False
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    rng = random.Random(args.seed)
+    workload = read_workload(args.workload)
+    weights = [entry.get('weight', 1) for entry in workload]
+
+    catalogue = sample_catalogue(app, args.sample)
+    with app.app_context():
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *_: statements.append(1))
+
+    client = app.test_client()
+    latencies = defaultdict(list)
+    queries = defaultdict(list)
+    errors = defaultdict(int)
+
+    for number in range(args.warmup + args.requests):
+        entry = rng.choices(workload, weights)[0]
+        values = request_values(rng, catalogue)
+        path = fill(entry['path'], values)
+        data = fill(entry.get('data'), values)
+        del statements[:]
+        started = time.perf_counter()
+        response = client.open(path, method = entry.get('method', 'GET'), data = data)
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        if number < args.warmup:
+            continue
+        latencies[entry['name']].append(elapsed * 1000)
+        queries[entry['name']].append(len(statements))
+        if response.status_code >= 400:
+            errors[entry['name']] += 1
+
+    print('%-20s %7s %9s %9s %9s %9s %7s' % ('route', 'count', 'p50 ms', 'p95 ms', 'p99 ms', 'queries', 'errors'))
+    for entry in workload:
+        name = entry['name']
+        if not latencies[name]:
+            continue
+        values_ms = sorted(latencies[name])
+        print('%-20s %7d %9.2f %9.2f %9.2f %9.2f %7d' % (
+            name,
+            len(values_ms),
+            percentile(values_ms, 50),
+            percentile(values_ms, 95),
+            percentile(values_ms, 99),
+            sum(queries[name]) / len(queries[name]),
+            errors[name]
+        ))
+
+if __name__ == '__main__':
+    main()
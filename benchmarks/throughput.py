@@ -0,0 +1,137 @@
+#----------------------------------------------------------------------------#
+# Sync vs async throughput
+#----------------------------------------------------------------------------#
+
+"""
+Compare the sync views with the async ones (ASYNC_VIEWS, see aio.py) under
+concurrent load. Each mode runs in a fresh process with the same number of
+worker threads, which each send requests through app.test_client() for
+--duration seconds; the report gives requests per second, latency
+percentiles and the process's peak memory, so the two can be compared at
+equal memory.
+
+    python benchmarks/throughput.py --concurrency 16 --duration 20
+    python benchmarks/throughput.py --database-url postgresql://localhost/fyyur_large --no-page-cache
+
+The default workload (benchmarks/read_workload.jsonl) only has the pages
+the async views serve; see benchmarks/loadtest.py for the format.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loadtest import read_workload, percentile, fill, sample_catalogue, request_values
+
+WORKLOAD = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'read_workload.jsonl')
+
+def run_mode(args):
+    """
+    Load the app in this process and report one JSON line of results
+    """
+    from app import app
+    if args.no_page_cache:
+        app.config['PAGE_CACHE_ENABLED'] = False
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    workload = read_workload(args.workload)
+    weights = [entry.get('weight', 1) for entry in workload]
+    catalogue = sample_catalogue(app, args.sample)
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    start = threading.Barrier(args.concurrency + 1)
+
+    def worker(number):
+        rng = random.Random(args.seed * 1000 + number)
+        client = app.test_client()
+        mine, failed = [], 0
+        start.wait()
+        deadline = time.perf_counter() + args.warmup + args.duration
+        measure_from = time.perf_counter() + args.warmup
+        while True:
+            entry = rng.choices(workload, weights)[0]
+            values = request_values(rng, catalogue)
+            started = time.perf_counter()
+            if started >= deadline:
+                break
+            response = client.open(fill(entry['path'], values), method = entry.get('method', 'GET'), data = fill(entry.get('data'), values))
+            response.get_data()
+            if started >= measure_from:
+                mine.append((time.perf_counter() - started) * 1000)
+                failed += response.status_code >= 400
+        with lock:
+            latencies.extend(mine)
+            errors.append(failed)
+
+    threads = [threading.Thread(target = worker, args = (number,)) for number in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    print(json.dumps({
+        'requests': len(latencies),
+        'per_second': len(latencies) / args.duration,
+        'p50_ms': percentile(latencies, 50) if latencies else None,
+        'p95_ms': percentile(latencies, 95) if latencies else None,
+        'p99_ms': percentile(latencies, 99) if latencies else None,
+        'errors': sum(errors),
+        # Kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workload', default = WORKLOAD)
+    parser.add_argument('--concurrency', type = int, default = 8, help = 'Worker threads per mode')
+    parser.add_argument('--duration', type = float, default = 10, help = 'Seconds measured per mode')
+    parser.add_argument('--warmup', type = float, default = 2, help = 'Seconds run before measuring')
+    parser.add_argument('--seed', type = int, default = 1)
+    parser.add_argument('--sample', type = int, default = 10000, help = 'Ids and names sampled from each table')
+    parser.add_argument('--database-url', help = 'Overrides DATABASE_URL')
+    parser.add_argument('--no-page-cache', action = 'store_true', help = 'Render every venue and artist page')
+    parser.add_argument('--mode', choices = ['sync', 'async'], help = 'Run one mode in this process')
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    if args.mode:
+        return run_mode(args)
+
+    results = {}
+    for mode in ('sync', 'async'):
+        env = dict(os.environ, ASYNC_VIEWS = '1' if mode == 'async' else '')
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--mode', mode] + sys.argv[1:],
+            env = env, stdout = subprocess.PIPE, check = True, universal_newlines = True
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print('%d threads, %gs per mode' % (args.concurrency, args.duration))
+    print('%-6s %9s %9s %9s %9s %9s %7s %9s %11s' % ('mode', 'requests', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'errors', 'peak MB', 'req/s/100MB'))
+    for mode, result in results.items():
+        print('%-6s %9d %9.1f %9.2f %9.2f %9.2f %7d %9.1f %11.1f' % (
+            mode,
+            result['requests'],
+            result['per_second'],
+            result['p50_ms'] or 0,
+            result['p95_ms'] or 0,
+            result['p99_ms'] or 0,
+            result['errors'],
+            result['peak_rss_mb'],
+            result['per_second'] / result['peak_rss_mb'] * 100
+        ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import uuid
+from datetime import datetime
+from werkzeug.utils import import_string
+from models import app, db, Show
+from utils import TTLCache
+
+#----------------------------------------------------------------------------#
+# Page cache
+#----------------------------------------------------------------------------#
+
+# Rendered venue and artist pages are cached under the entity's current
+# version. Handlers that change what a page shows bump the version instead
+# of deleting entries, so stale pages simply stop being addressed. Versions
+# are random tokens rather than counters: if a backend evicts a version it
+# is replaced by a fresh token and can never collide with an old page.
+# Versions are bumped in the process that made the change; a hit is only
+# served while its ETag still matches the database (get_current), which
+# covers changes made through other processes.
+
+class CacheBackend:
+    """
+    Storage for the page cache. Subclass this to keep pages somewhere other
+    than process memory, e.g. a shared cache server
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl = None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+# In-process LRU backend
+
+class LRUBackend(CacheBackend):
+
+    def __init__(self, maxsize = 1024):
+        self._cache = TTLCache(maxsize = maxsize, ttl = None)
+
+    def get(self, key):
+        return self._cache.lookup(key)
+
+    def set(self, key, value, ttl = None):
+        self._cache.store(key, value, ttl)
+
+    def delete(self, key):
+        self._cache.invalidate(key)
+
+class PageCache:
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def version(self, kind, entity_id):
+        key = 'version:%s:%s' % (kind, entity_id)
+        version = self.backend.get(key)
+        if version is None:
+            version = uuid.uuid4().hex
+            self.backend.set(key, version)
+        return version
+
+    def bump(self, kind, entity_id):
+        self.backend.set('version:%s:%s' % (kind, entity_id), uuid.uuid4().hex)
+        # A replica that has not caught up yet would render the old page
+        # under the new version, so pages read from a replica are not cached
+        # for a while after a change (see recently_bumped)
+        if app.config['DB_REPLICA_URLS']:
+            self.backend.set('bumped:%s:%s' % (kind, entity_id), True, app.config['DB_REPLICA_STICKY_SECONDS'])
+
+    def recently_bumped(self, kind, entity_id):
+        return self.backend.get('bumped:%s:%s' % (kind, entity_id)) is not None
+
+    def key(self, kind, entity_id):
+        """
+        Key of the entity's page at its current version. Views take the key
+        once, before reading from the database, so a bump that lands while a
+        page is rendering leaves that page under the superseded key
+        """
+        return 'page:%s:%s:%s' % (kind, entity_id, self.version(kind, entity_id))
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def get_current(self, key, etag):
+        """
+        The cached (etag, last_modified, page) under key, if it was rendered
+        from the state the entity is in now, as given by its ETag. Versions
+        are only bumped in the process that made the change (and its
+        backend, when that is not shared), so the ETag is what tells every
+        other process that a cached page is stale
+        """
+        cached = self.backend.get(key)
+        if cached is not None and cached[0] == etag:
+            return cached
+        return None
+
+    def set(self, key, page, expires_at = None):
+        """
+        Cache a rendered page until the next version bump, PAGE_CACHE_TTL
+        seconds, or expires_at (the next upcoming show, which would move to
+        the past shows), whichever comes first
+        """
+        ttl = app.config['PAGE_CACHE_TTL']
+        if expires_at is not None:
+            ttl = min(ttl, (expires_at - datetime.now()).total_seconds())
+        if ttl > 0:
+            self.backend.set(key, page, ttl)
+
+page_cache = PageCache(import_string(app.config['PAGE_CACHE_BACKEND'])(app.config['PAGE_CACHE_SIZE']))
+
+# A venue page lists the artists playing there and an artist page lists
+# their venues, so a change to one also expires its counterparts' pages.
+# Collect the pages before the write (a delete cascades to the shows) and
+# expire them once it has committed.
+
+def venue_pages(venue_id):
+    artists = db.session.query(Show.artist_id).filter(Show.venue_id == venue_id).distinct()
+    return [('venue', venue_id)] + [('artist', artist_id) for (artist_id,) in artists]
+
+def artist_pages(artist_id):
+    venues = db.session.query(Show.venue_id).filter(Show.artist_id == artist_id).distinct()
+    return [('artist', artist_id)] + [('venue', venue_id) for (venue_id,) in venues]
+
+def expire_pages(pages):
+    for kind, entity_id in pages:
+        page_cache.bump(kind, entity_id)
@@ -0,0 +1,138 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import hashlib
+from datetime import datetime, timezone
+from flask import request, session
+from sqlalchemy import func
+from models import app, db, Venue, Artist, Show, UpcomingShowFeed
+
+#----------------------------------------------------------------------------#
+# Validators
+#----------------------------------------------------------------------------#
+
+# Read pages carry an ETag built from a small aggregate query (row counts
+# and max(updated_at)) so a client holding the current page gets a 304
+# before the view runs its listing queries or renders a template. The
+# *_state functions only query, so the async views (aio.py) can run them
+# away from the request.
+
+def make_etag(*parts):
+    parts = (app.config['ETAG_SALT'], request.full_path) + parts
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:32]
+
+# updated_at is stored as naive UTC and start_time as naive local time
+
+def as_utc(value, local = False):
+    if value is None:
+        return None
+    return value.astimezone(timezone.utc) if local else value.replace(tzinfo = timezone.utc)
+
+# Venue and artist listings change when a row is added, edited or deleted
+
+def list_state(model):
+    return tuple(db.session.query(func.count(model.id), func.max(model.updated_at)).one())
+
+def list_etag(model):
+    return make_etag(*list_state(model))
+
+# The shows listing reads the upcoming shows feed, whose rows are rewritten
+# when their venue or artist is renamed, and loses a day's shows at midnight
+
+def upcoming_shows_state(since):
+    row = db.session.query(
+        db.session.query(func.count(UpcomingShowFeed.show_id)).filter(UpcomingShowFeed.start_time >= since).scalar_subquery(),
+        db.session.query(func.max(UpcomingShowFeed.updated_at)).scalar_subquery()
+    ).one()
+    return (since,) + tuple(row)
+
+def upcoming_shows_etag(since):
+    return make_etag(*upcoming_shows_state(since))
+
+def detail_state(model, entity_id, now):
+    if model is Venue:
+        counterpart, own_key, counterpart_key = Artist, Show.venue_id, Show.artist_id
+    else:
+        counterpart, own_key, counterpart_key = Venue, Show.artist_id, Show.venue_id
+    row = db.session.query(
+        model.updated_at,
+        func.count(Show.id),
+        func.max(Show.start_time).filter(Show.start_time < now),
+        func.max(Show.updated_at),
+        func.max(counterpart.updated_at)
+    ).select_from(model).outerjoin(
+        Show, own_key == model.id
+    ).outerjoin(
+        counterpart, counterpart_key == counterpart.id
+    ).filter(
+        model.id == entity_id
+    ).group_by(model.id, model.updated_at).first()
+    return tuple(row) if row is not None else None
+
+def detail_validators(model, entity_id, now):
+    """
+    (etag, last_modified) for a venue or artist page, or None if there is no
+    such entity. The page changes when the entity, one of its shows or a
+    counterpart is written, and when an upcoming show moves into the past
+    """
+    return detail_validators_for(detail_state(model, entity_id, now))
+
+def detail_validators_for(row):
+    if row is None:
+        return None
+    updated_at, shows, last_show, shows_updated_at, counterparts_updated_at = row
+    last_modified = max(filter(None, [
+        as_utc(updated_at),
+        as_utc(last_show, local = True),
+        as_utc(shows_updated_at),
+        as_utc(counterparts_updated_at)
+    ]))
+    return make_etag(*row), last_modified
+
+# Deleting a venue or artist cascades to its shows, which leaves nothing
+# behind to advance the counterparts' validators, so the delete handlers
+# touch the counterparts in the same transaction
+
+def touch_pages(pages):
+    now = datetime.utcnow()
+    for model, kind in ((Venue, 'venue'), (Artist, 'artist')):
+        ids = [entity_id for page_kind, entity_id in pages if page_kind == kind]
+        if ids:
+            model.query.filter(model.id.in_(ids)).update(
+                { model.updated_at: now },
+                synchronize_session = False
+            )
+
+#----------------------------------------------------------------------------#
+# Responses
+#----------------------------------------------------------------------------#
+
+def not_modified(etag, last_modified = None):
+    # If-None-Match takes precedence over If-Modified-Since (RFC 7232 6)
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified.replace(microsecond = 0) <= request.if_modified_since
+    return False
+
+def client_is_current(etag, last_modified = None):
+    return '_flashes' not in session and not_modified(etag, last_modified)
+
+def conditional_response(etag, last_modified, page):
+    """
+    Answer with a 304 when the client's copy is current, otherwise with the
+    page. page may be a callable, which is only called when the page has to
+    be sent. A pending flashed message always gets the full page.
+    Listings pass last_modified=None: deleting a row does not advance
+    max(updated_at), so only their ETag (which counts rows) is reliable.
+    """
+    if client_is_current(etag, last_modified):
+        response = app.response_class(status = 304)
+    else:
+        response = app.make_response(page() if callable(page) else page)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
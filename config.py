@@ -1,4 +1,6 @@
 import os
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
 SECRET_KEY = 'OMZ8%/Gve(_SfKG^+|,|np+V#|zSqP9.0xPEFuzb(PQ9U!Enu2:)k]83c-cBEx'
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -6,9 +8,149 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 # Enable debug mode.
 DEBUG = True
 
-#Turn off track modifications warning
-SQLALCHEMY_TRACK_MODIFICATIONS = True
+# Nothing listens for model change signals, so don't pay for tracking them
+SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Seconds between checks that the in-memory genre list is still current
+GENRE_REGISTRY_TTL = 300
+
+# Seconds before the artist and venue typeahead indexes are rebuilt
+SUGGEST_INDEX_TTL = 300
+
+# Seconds between checks that the in-memory search indexes (used when the
+# database is not Postgres) still match the tables
+SEARCH_INDEX_TTL = 10
+
+# Raise instead of lazy loading relationships a view did not ask for. The
+# tests set it (RAISE_ON_LAZY_LOAD=1) to catch unplanned queries; models.py
+# reads it once, at import.
+RAISE_ON_LAZY_LOAD = os.environ.get('RAISE_ON_LAZY_LOAD') == '1'
 
 # Connect to the database
 # DONE IMPLEMENT DATABASE URL
-SQLALCHEMY_DATABASE_URI = 'postgres://postgres@localhost:5432/fyyur'
+# DATABASE_URL overrides the local database. SQLAlchemy 1.4 no longer
+# accepts the postgres:// scheme some hosts still hand out.
+SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'postgresql://postgres@localhost:5432/fyyur')
+if SQLALCHEMY_DATABASE_URI.startswith('postgres://'):
+    SQLALCHEMY_DATABASE_URI = 'postgresql://' + SQLALCHEMY_DATABASE_URI[len('postgres://'):]
+
+# Connection pool, per worker process, from the environment. Every gunicorn
+# worker can hold DB_POOL_SIZE + DB_MAX_OVERFLOW connections, so keep
+# workers * (size + overflow) under the server's max_connections.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 5))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+
+# Behind PgBouncer in transaction pooling mode the bouncer owns the pool:
+# connections are not pooled (or pinged) here, nothing is set per session
+# and the statement timeout is applied per transaction instead (see
+# database.py). Drivers that cache prepared statements must turn that off.
+DB_PGBOUNCER = os.environ.get('DB_PGBOUNCER', '').lower() in ('1', 'true', 'yes', 'on')
+
+# executemany_mode and libpq's connection options are psycopg2's; other
+# drivers (postgresql+pg8000, postgresql+psycopg) get the pool options only
+# and the statement timeout per transaction, as behind PgBouncer.
+DB_DRIVER = make_url(SQLALCHEMY_DATABASE_URI).drivername
+DB_PSYCOPG2 = DB_DRIVER in ('postgresql', 'postgresql+psycopg2')
+DB_STATEMENT_TIMEOUT_PER_TRANSACTION = DB_DRIVER.startswith('postgresql') and (DB_PGBOUNCER or not DB_PSYCOPG2)
+
+SQLALCHEMY_ENGINE_OPTIONS = {}
+if DB_DRIVER.startswith('postgresql'):
+    if DB_PSYCOPG2:
+        SQLALCHEMY_ENGINE_OPTIONS['executemany_mode'] = 'values_plus_batch'
+    if DB_PGBOUNCER:
+        SQLALCHEMY_ENGINE_OPTIONS['poolclass'] = NullPool
+    else:
+        SQLALCHEMY_ENGINE_OPTIONS.update(
+            pool_size = DB_POOL_SIZE,
+            max_overflow = DB_MAX_OVERFLOW,
+            pool_timeout = DB_POOL_TIMEOUT,
+            pool_recycle = DB_POOL_RECYCLE,
+            pool_pre_ping = True
+        )
+        if DB_PSYCOPG2:
+            SQLALCHEMY_ENGINE_OPTIONS['connect_args'] = { 'options': '-c statement_timeout=%d' % DB_STATEMENT_TIMEOUT_MS }
+else:
+    SQLALCHEMY_ENGINE_OPTIONS['pool_pre_ping'] = True
+
+# Read replicas, comma separated in DATABASE_REPLICA_URLS. Listing, search
+# and detail views read from a random one (see database.py); writes and edit
+# forms always use the primary. After a write the client reads from the
+# primary for DB_REPLICA_STICKY_SECONDS, which should cover replica lag.
+# Each replica gets its own pool with the options above.
+DB_REPLICA_URLS = [
+    'postgresql://' + url[len('postgres://'):] if url.startswith('postgres://') else url
+    for url in (url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(','))
+    if url
+]
+SQLALCHEMY_BINDS = { 'replica_%d' % i: url for i, url in enumerate(DB_REPLICA_URLS) }
+DB_REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5))
+
+# Serve the listing and detail pages from async views on SQLAlchemy's
+# asyncio engine (see aio.py), which run a page's independent queries
+# concurrently. Needs flask[async] and asyncpg, or aiosqlite for SQLite.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '').lower() in ('1', 'true', 'yes', 'on')
+
+# Listing pages (artists, venues, shows) are paginated by keyset cursor
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Venue and artist pages show this many past and upcoming shows, with
+# "load more" for the rest
+DETAIL_SHOWS_LIMIT = 10
+
+# A show books its venue and artist for this long from its start time; new
+# shows that overlap a booking are refused (see availability.py)
+SHOW_DURATION_MINUTES = 180
+
+# Most shows one batch (a tour or residency) can create
+MAX_BATCH_SHOWS = 200
+
+# Rendered venue and artist pages are cached until they change. The backend
+# is any cache.CacheBackend, built with PAGE_CACHE_SIZE. Each hit is checked
+# against the page's ETag first, so pages cached in one worker process are
+# not served after another one changes them.
+PAGE_CACHE_ENABLED = True
+PAGE_CACHE_BACKEND = 'cache.LRUBackend'
+PAGE_CACHE_SIZE = 1024
+PAGE_CACHE_TTL = 3600
+
+# Rows fetched per round trip when the JSON API streams a listing
+API_BATCH_SIZE = 500
+
+# Rows per executemany and commit in `flask import`
+IMPORT_BATCH_SIZE = 5000
+
+# Rows per server-side cursor fetch in `flask export`
+EXPORT_BATCH_SIZE = 5000
+
+# Opt-in per-request SQL instrumentation: query count, DB time, rows and
+# the slowest statements go out in Server-Timing headers and as JSON lines
+# in SQL_PROFILING_LOG. Statements slower than SQL_SLOW_QUERY_MS are logged
+# in full. PERF_ENDPOINT_ENABLED serves rolling per-route histograms of the
+# last PERF_WINDOW requests at /_debug/perf; never enable it in production.
+SQL_PROFILING = False
+SQL_PROFILING_LOG = 'perf.log'
+SQL_PROFILING_SLOWEST = 5
+SQL_SLOW_QUERY_MS = 100
+PERF_ENDPOINT_ENABLED = False
+PERF_WINDOW = 1000
+
+# Mixed into every ETag. Change it when templates change so clients drop
+# pages they validated against the old markup.
+ETAG_SALT = '1'
+
+# Venues are placed offline from these centroid tables (see geo.py); add a
+# zip code table, e.g. one built from the Census ZCTA gazetteer, to place
+# venues by the zip code at the end of their address
+GEO_CENTROID_FILES = [os.path.join(basedir, 'geodata', 'us_cities.csv')] + \
+    [path for path in os.environ.get('GEO_CENTROID_FILES', '').split(os.pathsep) if path]
+
+# /venues/near searches at most GEO_MAX_CELLS index ranges, within
+# GEO_MAX_RADIUS_KM, and lists the GEO_NEAR_LIMIT nearest venues
+GEO_MAX_CELLS = 16
+GEO_DEFAULT_RADIUS_KM = 25
+GEO_MAX_RADIUS_KM = 250
+GEO_NEAR_LIMIT = 100
@@ -0,0 +1,136 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import asyncio
+import functools
+import os
+import random
+import time
+from flask import current_app, g, session, has_request_context
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import event, orm
+from sqlalchemy.engine import Engine
+
+#----------------------------------------------------------------------------#
+# Engine setup
+#----------------------------------------------------------------------------#
+
+# Engine and pool options are built in config.py from the environment; what
+# cannot be expressed as an engine option is set up here.
+
+def init_database(app, db):
+    if app.config['DB_STATEMENT_TIMEOUT_PER_TRANSACTION']:
+        timeout = int(app.config['DB_STATEMENT_TIMEOUT_MS'])
+
+        # SET LOCAL lasts until the end of the transaction, so nothing stays
+        # behind on a server connection PgBouncer then hands to another
+        # client, and it needs no driver-specific connection options
+        @event.listens_for(Engine, 'begin')
+        def set_statement_timeout(conn):
+            if conn.dialect.name == 'postgresql':
+                conn.exec_driver_sql('SET LOCAL statement_timeout = %d' % timeout)
+
+    # A client that has just written reads from the primary for a while, so
+    # the page it is redirected to shows its change even if the replicas
+    # lag behind
+    @app.after_request
+    def stick_to_primary(response):
+        if g.pop('db_wrote', False) and app.config['DB_REPLICA_URLS']:
+            session['db_primary_until'] = time.time() + app.config['DB_REPLICA_STICKY_SECONDS']
+        return response
+
+#----------------------------------------------------------------------------#
+# Read replicas
+#----------------------------------------------------------------------------#
+
+# Replicas are configured as SQLAlchemy binds (replica_0, replica_1, ...).
+# Views marked with @reads_from_replica pick one per request and the
+# routing session sends all of that request's queries to it. Everything
+# else - writes, edit forms, deletes - uses the primary, as does any flush.
+
+class RoutingSession(SignallingSession):
+
+    def __init__(self, db, **options):
+        self.db = db
+        SignallingSession.__init__(self, db, **options)
+
+    def get_bind(self, mapper = None, clause = None):
+        bind_key = g.get('db_bind') if has_request_context() else None
+        if bind_key is not None and not self._flushing:
+            return self.db.get_engine(self.app, bind = bind_key)
+        return SignallingSession.get_bind(self, mapper, clause)
+
+@event.listens_for(RoutingSession, 'after_commit')
+def record_write(db_session):
+    if has_request_context():
+        g.db_wrote = True
+
+class Database(SQLAlchemy):
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_ = RoutingSession, db = self, **options)
+
+def use_replica():
+    """
+    Send the rest of this request's queries to a random replica, unless there
+    are none or the client is still within its read-your-writes window
+    """
+    replicas = len(current_app.config['DB_REPLICA_URLS'])
+    if replicas and session.get('db_primary_until', 0) <= time.time():
+        g.db_bind = 'replica_%d' % random.randrange(replicas)
+
+def reads_from_replica(view):
+    if asyncio.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            use_replica()
+            return await view(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        use_replica()
+        return view(*args, **kwargs)
+    return wrapper
+
+def reading_from_replica():
+    return has_request_context() and g.get('db_bind') is not None
+
+def pool_report(app, db):
+    """
+    One line describing the primary engine's effective pool, e.g. for the
+    startup log. Each replica has a pool of its own with the same options
+    """
+    engine = db.engine
+    pool = engine.pool
+    settings = [
+        '%s+%s' % (engine.dialect.name, engine.dialect.driver),
+        'pool=%s' % type(pool).__name__,
+    ]
+    if hasattr(pool, 'size'):
+        size, overflow = pool.size(), pool._max_overflow
+        settings += [
+            'size=%d' % size,
+            'max_overflow=%d' % overflow,
+            'timeout=%ss' % pool._timeout,
+        ]
+    settings += [
+        'recycle=%s' % ('%ss' % pool._recycle if pool._recycle >= 0 else 'off'),
+        'pre_ping=%s' % ('on' if pool._pre_ping else 'off'),
+    ]
+    if engine.dialect.name == 'postgresql':
+        settings += [
+            'statement_timeout=%dms' % app.config['DB_STATEMENT_TIMEOUT_MS'],
+            'pgbouncer=%s' % ('on' if app.config['DB_PGBOUNCER'] else 'off'),
+        ]
+    if app.config['DB_REPLICA_URLS']:
+        settings.append('replicas=%d' % len(app.config['DB_REPLICA_URLS']))
+    if hasattr(pool, 'size'):
+        connections = size + max(overflow, 0)
+        workers = os.environ.get('WEB_CONCURRENCY')
+        if workers and workers.isdigit():
+            settings.append('max connections=%d per worker, %d for %s workers' % (connections, connections * int(workers), workers))
+        else:
+            settings.append('max connections=%d per worker' % connections)
+    return 'Database: ' + ' '.join(settings)
@@ -0,0 +1,86 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+import click
+from flask.cli import with_appcontext
+from sqlalchemy.orm import selectinload, raiseload
+from models import app, db, Venue, Artist, Show, Genre
+
+#----------------------------------------------------------------------------#
+# Snapshot export
+#----------------------------------------------------------------------------#
+
+# `flask export DIRECTORY` writes the catalogue as one gzipped NDJSON file
+# per table (genres, venues, artists, shows) plus a manifest. Rows are read
+# through server-side cursors (yield_per) and written as they arrive, so
+# the export never holds a table in memory. Venues and artists carry their
+# genre slugs, which is how the genre join tables are exported; the files
+# are what `flask import snapshot DIRECTORY` restores.
+
+def json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def row_record(instance):
+    table = instance.__table__
+    return { column.name: json_value(getattr(instance, column.key)) for column in table.columns }
+
+def entity_record(instance):
+    record = row_record(instance)
+    record['genres'] = [genre.slug for genre in instance.genres]
+    return record
+
+SNAPSHOT_TABLES = (
+    ('genres', lambda: Genre.query.order_by(Genre.id), row_record),
+    ('venues', lambda: Venue.query.options(selectinload(Venue.genres), raiseload('*')).order_by(Venue.id), entity_record),
+    ('artists', lambda: Artist.query.options(selectinload(Artist.genres), raiseload('*')).order_by(Artist.id), entity_record),
+    ('shows', lambda: Show.query.options(raiseload('*')).order_by(Show.id), row_record),
+)
+
+def export_table(path, query, serialize, batch_size, compresslevel):
+    count = 0
+    with gzip.open(path, 'wt', encoding = 'utf-8', compresslevel = compresslevel) as file:
+        for instance in query.yield_per(batch_size):
+            file.write(json.dumps(serialize(instance), separators = (',', ':')))
+            file.write('\n')
+            count += 1
+    return count
+
+def export_snapshot(directory, batch_size, compresslevel = 6):
+    os.makedirs(directory, exist_ok = True)
+    counts = {}
+    for name, query, serialize in SNAPSHOT_TABLES:
+        started = time.perf_counter()
+        path = os.path.join(directory, name + '.ndjson.gz')
+        counts[name] = export_table(path, query(), serialize, batch_size, compresslevel)
+        elapsed = time.perf_counter() - started
+        click.echo('%s: %d rows in %.1fs (%.0f rows/s)' % (
+            name, counts[name], elapsed, counts[name] / max(elapsed, 1e-9)
+        ))
+        # Let the session drop the instances of the table just written
+        db.session.expunge_all()
+
+    with open(os.path.join(directory, 'manifest.json'), 'w') as file:
+        json.dump({
+            'created_at': datetime.utcnow().isoformat(),
+            'format': 'ndjson.gz',
+            'counts': counts
+        }, file, indent = 2)
+    return counts
+
+@click.command('export')
+@click.argument('directory', type = click.Path(file_okay = False))
+@click.option('--batch-size', type = int, help = 'Rows fetched per round trip (EXPORT_BATCH_SIZE).')
+@click.option('--compresslevel', type = click.IntRange(1, 9), default = 6, show_default = True, help = 'gzip compression level.')
+@with_appcontext
+def export_command(directory, batch_size, compresslevel):
+    """
+    Write genres, venues, artists and shows to DIRECTORY as gzipped NDJSON,
+    restorable with `flask import snapshot DIRECTORY`.
+    """
+    export_snapshot(directory, batch_size or app.config['EXPORT_BATCH_SIZE'], compresslevel)
@@ -0,0 +1,127 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+import click
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import or_, select, true
+from models import db, Venue, Artist, Show, UpcomingShowFeed
+
+#----------------------------------------------------------------------------#
+# Upcoming shows feed
+#----------------------------------------------------------------------------#
+
+# UpcomingShowFeed holds every show from the start of today on, with its
+# venue's and artist's names and image links. The write handlers keep it
+# in step in the same transaction as their own changes; a bulk import
+# rebuilds it. Rows touched here get a new updated_at, which is what the
+# /shows ETag (conditional.upcoming_shows_state) watches.
+
+FEED_COLUMNS = [
+    Show.id,
+    Show.start_time,
+    Show.venue_id,
+    Venue.name,
+    Venue.image_link,
+    Show.artist_id,
+    Artist.name,
+    Artist.image_link,
+]
+
+def feed_cutoff():
+    """
+    Shows before this are no longer listed; /shows lists from midnight
+    """
+    today = datetime.today()
+    return datetime(today.year, today.month, today.day)
+
+def insert_feed_rows(condition):
+    query = select(*FEED_COLUMNS).join(
+        Venue, Venue.id == Show.venue_id
+    ).join(
+        Artist, Artist.id == Show.artist_id
+    ).where(
+        Show.start_time >= feed_cutoff(),
+        condition
+    )
+    table = UpcomingShowFeed.__table__
+    columns = ['show_id', 'start_time', 'venue_id', 'venue_name', 'venue_image_link', 'artist_id', 'artist_name', 'artist_image_link']
+    return db.session.execute(table.insert().from_select(columns, query)).rowcount
+
+def add_to_feed(show_ids):
+    """
+    Add the upcoming ones of these new (flushed) shows to the feed
+    """
+    if show_ids:
+        insert_feed_rows(Show.id.in_(show_ids))
+
+# Only rows whose name or image actually changes are rewritten, so an edit
+# to anything else leaves /shows and its ETag alone
+
+def update_feed_venue(venue):
+    UpcomingShowFeed.query.filter(
+        UpcomingShowFeed.venue_id == venue.id,
+        or_(
+            UpcomingShowFeed.venue_name.is_distinct_from(venue.name),
+            UpcomingShowFeed.venue_image_link.is_distinct_from(venue.image_link)
+        )
+    ).update({
+        UpcomingShowFeed.venue_name: venue.name,
+        UpcomingShowFeed.venue_image_link: venue.image_link,
+        UpcomingShowFeed.updated_at: datetime.utcnow()
+    }, synchronize_session = False)
+
+def update_feed_artist(artist):
+    UpcomingShowFeed.query.filter(
+        UpcomingShowFeed.artist_id == artist.id,
+        or_(
+            UpcomingShowFeed.artist_name.is_distinct_from(artist.name),
+            UpcomingShowFeed.artist_image_link.is_distinct_from(artist.image_link)
+        )
+    ).update({
+        UpcomingShowFeed.artist_name: artist.name,
+        UpcomingShowFeed.artist_image_link: artist.image_link,
+        UpcomingShowFeed.updated_at: datetime.utcnow()
+    }, synchronize_session = False)
+
+# The foreign key cascades from Show where the database enforces it;
+# deleting the rows here as well covers SQLite and bulk deletes
+
+def remove_venue_from_feed(venue_id):
+    UpcomingShowFeed.query.filter(UpcomingShowFeed.venue_id == venue_id).delete(synchronize_session = False)
+
+def remove_artist_from_feed(artist_id):
+    UpcomingShowFeed.query.filter(UpcomingShowFeed.artist_id == artist_id).delete(synchronize_session = False)
+
+def rebuild_feed():
+    UpcomingShowFeed.query.delete(synchronize_session = False)
+    rows = insert_feed_rows(true())
+    db.session.commit()
+    return rows
+
+def prune_feed():
+    rows = UpcomingShowFeed.query.filter(
+        UpcomingShowFeed.start_time < feed_cutoff()
+    ).delete(synchronize_session = False)
+    db.session.commit()
+    return rows
+
+feed_command = AppGroup('feed', help = 'Maintain the upcoming shows feed.')
+
+@feed_command.command('prune')
+@with_appcontext
+def prune_command():
+    """
+    Drop shows that started before today. Run daily, e.g. from cron after
+    midnight: FLASK_APP=app flask feed prune
+    """
+    click.echo('Pruned %d shows from the feed.' % prune_feed())
+
+@feed_command.command('rebuild')
+@with_appcontext
+def rebuild_command():
+    """
+    Refill the feed from the shows table.
+    """
+    click.echo('Feed rebuilt with %d upcoming shows.' % rebuild_feed())
@@ -1,67 +1,198 @@
 from datetime import datetime
 from flask_wtf import Form
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField, ValidationError
-from wtforms.validators import DataRequired, AnyOf, URL
+from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField, IntegerField, TextAreaField, ValidationError
+from wtforms.widgets import HiddenInput
+from wtforms.validators import DataRequired, AnyOf, URL, Optional
+from itertools import islice
+import dateutil.parser
+import dateutil.rrule
+from flask import current_app
+from sqlalchemy.sql import exists
 from models import *
+from genres import genre_registry
+from availability import lock_bookings, booking_conflicts, describe_conflict, slot_conflicts
 from utils import *
 
 # Set up genre validation
 def validate_genres(form, field):
     if not field.data:
         raise ValidationError('Genre invalid.')
-    for genre_value in field.data:
-        if not Genre.query.get( genre_value ):
-            raise ValidationError('Invalid genre choice!')
+    if genre_registry.missing(field.data):
+        raise ValidationError('Invalid genre choice!')
 
-# Load genres from database for artist and venue forms
+# Load genres from the genre registry for artist and venue forms. Choices are
+# resolved when a form is built, so importing the forms needs no database.
 
 def get_genres_for_form():
-    genre_choices = []
-    for genre in Genre.query.all():
-        genre_choices.append(( genre.id, genre.name ))
-    return genre_choices
-
-# Load artists from database for shows form
-
-def get_artists_for_form():
-    artist_choices = [
-        ('', 'Select Artist')
-    ]
-    for artist in Artist.query.all():
-        artist_choices.append(( artist.id, artist.name ))
-    return artist_choices
-
-# Load venues from database for shows form
-
-def get_venues_for_form():
-    venue_choices = [
-        ('', 'Select Venue')
-    ]
-    for venue in Venue.query.all():
-        venue_choices.append(( venue.id, venue.name ))
-    return venue_choices
+    return [( genre.id, genre.name ) for genre in genre_registry.all()]
 
 # Show form
 
 class ShowForm(Form):
-    artist_id = SelectField(
+    # Artist and venue are picked through the typeahead endpoints and
+    # posted as ids, instead of rendering every row into a dropdown
+    artist_id = IntegerField(
         'artist_id',
         validators = [DataRequired()],
-        choices = get_artists_for_form()
+        widget = HiddenInput()
     )
 
-    venue_id = SelectField(
+    venue_id = IntegerField(
         'venue_id',
         validators = [DataRequired()],
-        choices = get_venues_for_form()
+        widget = HiddenInput()
     )
 
     start_time = DateTimeField(
         'start_time',
         validators = [DataRequired()],
-        default = datetime.today()
+        default = datetime.today
     )
 
+    def validate(self):
+        if not super().validate():
+            return False
+
+        # Check both references exist with a single query
+        artist_exists, venue_exists = db.session.query(
+            exists().where(Artist.id == self.artist_id.data),
+            exists().where(Venue.id == self.venue_id.data)
+        ).one()
+        if not artist_exists:
+            self.artist_id.errors.append('Unknown artist.')
+        if not venue_exists:
+            self.venue_id.errors.append('Unknown venue.')
+        if not (artist_exists and venue_exists):
+            return False
+
+        # Refuse double bookings. The locks are held until the show is
+        # committed, so a concurrent booking waits and then sees it
+        lock_bookings([self.venue_id.data], [self.artist_id.data])
+        conflicts = booking_conflicts(self.venue_id.data, self.artist_id.data, self.start_time.data)
+        for conflict in conflicts:
+            self.start_time.errors.append(describe_conflict(conflict, self.venue_id.data))
+        return not conflicts
+
+# Batch show form
+# One artist on a tour or residency: start times are listed one per line or
+# generated from an RRULE, and played at the one venue given or, with one
+# venue per start time, at each venue in turn. After validate(), slots
+# holds (venue_id, start_time) per show and slot_errors what is wrong with
+# each; the form only validates when every slot is free.
+
+class ShowBatchForm(Form):
+    artist_id = IntegerField(
+        'artist_id',
+        validators = [DataRequired()],
+        widget = HiddenInput()
+    )
+
+    # Comma separated, filled in by the venue typeahead
+    venue_ids = StringField(
+        'venue_ids',
+        validators = [DataRequired(message = 'Add at least one venue.')],
+        widget = HiddenInput()
+    )
+
+    start_times = TextAreaField(
+        'start_times'
+    )
+
+    rrule = StringField(
+        'rrule'
+    )
+
+    first_show = DateTimeField(
+        'first_show',
+        format = '%Y-%m-%d %H:%M',
+        validators = [Optional()]
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.slots = []
+        self.slot_errors = []
+        self.venue_names = {}
+
+    def parse_venue_ids(self):
+        try:
+            return [int(venue_id) for venue_id in self.venue_ids.data.replace(',', ' ').split()]
+        except ValueError:
+            self.venue_ids.errors.append('Invalid venue.')
+            return []
+
+    def parse_start_times(self):
+        limit = current_app.config['MAX_BATCH_SHOWS']
+        if self.rrule.data.strip():
+            if self.start_times.data.strip():
+                self.rrule.errors.append('Give either start times or a recurrence rule, not both.')
+                return []
+            if not self.first_show.data:
+                self.first_show.errors.append('A recurrence rule needs the first show.')
+                return []
+            try:
+                rule = dateutil.rrule.rrulestr(self.rrule.data.strip(), dtstart = self.first_show.data)
+                start_times = list(islice(rule, limit + 1))
+            except (ValueError, TypeError):
+                self.rrule.errors.append('Invalid recurrence rule.')
+                return []
+            # Show times are stored as the venue's local time, without a zone
+            if any(start_time.tzinfo is not None for start_time in start_times):
+                self.rrule.errors.append('The recurrence rule must not set a time zone.')
+                return []
+        else:
+            start_times = []
+            for number, line in enumerate(self.start_times.data.splitlines(), 1):
+                if line.strip():
+                    try:
+                        start_time = dateutil.parser.parse(line)
+                    except (ValueError, OverflowError):
+                        self.start_times.errors.append('Line %d is not a date and time.' % number)
+                        continue
+                    if start_time.tzinfo is not None:
+                        self.start_times.errors.append('Line %d has a time zone; give the local time of the show.' % number)
+                    else:
+                        start_times.append(start_time)
+            if self.start_times.errors:
+                return []
+            if not start_times:
+                self.start_times.errors.append('List at least one start time.')
+        if len(start_times) > limit:
+            field = self.rrule if self.rrule.data.strip() else self.start_times
+            field.errors.append('At most %d shows can be created at once.' % limit)
+            return []
+        return start_times
+
+    def validate(self):
+        if not super().validate():
+            return False
+        venue_ids = self.parse_venue_ids()
+        start_times = self.parse_start_times()
+        if not venue_ids or not start_times:
+            return False
+        if len(venue_ids) == 1:
+            self.slots = [(venue_ids[0], start_time) for start_time in start_times]
+        elif len(venue_ids) == len(start_times):
+            self.slots = list(zip(venue_ids, start_times))
+        else:
+            self.venue_ids.errors.append('Give one venue, or one venue per show (%d).' % len(start_times))
+            return False
+
+        # The venue names are kept for the per-slot report
+        artist_exists = db.session.query(exists().where(Artist.id == self.artist_id.data)).scalar()
+        self.venue_names = dict(db.session.query(Venue.id, Venue.name).filter(Venue.id.in_(set(venue_ids))))
+        if not artist_exists:
+            self.artist_id.errors.append('Unknown artist.')
+        unknown = [venue_id for venue_id in venue_ids if venue_id not in self.venue_names]
+        if unknown:
+            self.venue_ids.errors.append('Unknown venue %s.' % ', '.join(map(str, sorted(set(unknown)))))
+        if not artist_exists or unknown:
+            return False
+
+        lock_bookings(venue_ids, [self.artist_id.data])
+        self.slot_errors = slot_conflicts(self.artist_id.data, self.slots)
+        return not any(self.slot_errors)
+
 # Venue form
 
 class VenueForm(Form):
@@ -101,8 +232,7 @@ class VenueForm(Form):
         validators = [
             validate_genres
         ],
-        coerce = int,
-        choices = get_genres_for_form()
+        coerce = int
     )
 
     website = StringField(
@@ -121,6 +251,10 @@ class VenueForm(Form):
         'seeking_description'
     )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.genres.choices = get_genres_for_form()
+
 # Artist form
 
 class ArtistForm(Form):
@@ -155,8 +289,7 @@ class ArtistForm(Form):
         validators = [
             validate_genres
         ],
-        coerce = int,
-        choices = get_genres_for_form()
+        coerce = int
     )
 
     website = StringField(
@@ -173,4 +306,8 @@ class ArtistForm(Form):
 
     seeking_description = StringField(
         'seeking_description'
-    )
\ No newline at end of file
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.genres.choices = get_genres_for_form()
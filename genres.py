@@ -0,0 +1,89 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import threading
+import time
+from sqlalchemy import func
+from sqlalchemy.orm import make_transient_to_detached
+from models import app, db, Genre
+
+#----------------------------------------------------------------------------#
+# Genre registry
+#----------------------------------------------------------------------------#
+
+# Genres are a short, near-static list seeded by migration, so they are
+# loaded once per process and kept in memory. Validation then needs no
+# queries and attaching genres to a venue or artist merges the cached rows
+# into the session without loading them again.
+#
+# The cache is dropped when its version is bumped (invalidate()), and at
+# most every GENRE_REGISTRY_TTL seconds a cheap count/max(id) stamp is
+# compared with the database to pick up changes made by other processes.
+
+class GenreRegistry:
+
+    def __init__(self):
+        self.version = 0
+        self._lock = threading.Lock()
+        self._genres = None
+        self._loaded_version = None
+        self._stamp = None
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+
+    def _read_stamp(self):
+        return tuple(db.session.query(func.count(Genre.id), func.max(Genre.id)).one())
+
+    def _load(self):
+        # Built from plain rows rather than loaded through the session, so
+        # the cached instances never belong to (or leave) a request's session
+        genres = {}
+        for row in db.session.query(Genre.id, Genre.name, Genre.slug).order_by(Genre.name):
+            genre = Genre(id = row.id, name = row.name, slug = row.slug)
+            make_transient_to_detached(genre)
+            genres[row.id] = genre
+        return genres
+
+    def _current(self):
+        ttl = app.config.get('GENRE_REGISTRY_TTL', 300)
+        with self._lock:
+            now = time.monotonic()
+            if self._genres is not None and self._loaded_version == self.version:
+                if now - self._checked_at < ttl:
+                    return self._genres
+                stamp = self._read_stamp()
+                self._checked_at = now
+                if stamp == self._stamp:
+                    return self._genres
+            else:
+                stamp = self._read_stamp()
+
+            self._stamp = stamp
+            self._genres = self._load()
+            self._loaded_version = self.version
+            self._checked_at = now
+            return self._genres
+
+    def all(self):
+        return list(self._current().values())
+
+    def get(self, genre_id):
+        return self._current().get(genre_id)
+
+    def missing(self, genre_ids):
+        genres = self._current()
+        return [genre_id for genre_id in genre_ids if genre_id not in genres]
+
+    def resolve(self, genre_ids):
+        """
+        Return session-bound Genre instances for the given ids without
+        querying; raises KeyError for an unknown id
+        """
+        genres = self._current()
+        return [db.session.merge(genres[genre_id], load = False) for genre_id in genre_ids]
+
+genre_registry = GenreRegistry()
@@ -0,0 +1,300 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import csv
+import math
+import re
+import threading
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import and_, or_
+from models import app, db, Venue
+
+#----------------------------------------------------------------------------#
+# Geocoding
+#----------------------------------------------------------------------------#
+
+# Venues are placed offline, from centroid tables bundled with the app
+# (GEO_CENTROID_FILES): CSV files with zip, city, state, latitude and
+# longitude columns, where a row gives the centroid of either a zip code or
+# a city. A venue whose address ends in a known zip code gets that zip's
+# centroid, otherwise the centroid of its city; venues in neither table
+# have no coordinates and are left out of the nearby search.
+
+CITY_PREFIXES = { 'st': 'saint', 'ste': 'sainte', 'ft': 'fort', 'mt': 'mount' }
+
+ZIP_AT_END = re.compile(r'\b(\d{5})(?:-\d{4})?\s*$')
+
+def city_key(city, state):
+    words = (city or '').lower().replace('.', ' ').split()
+    if words and words[0] in CITY_PREFIXES:
+        words[0] = CITY_PREFIXES[words[0]]
+    return ' '.join(words), (state or '').strip().upper()
+
+class Geocoder:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._zips = None
+        self._cities = None
+
+    def _load(self):
+        zips, cities = {}, {}
+        for path in app.config['GEO_CENTROID_FILES']:
+            with open(path, newline = '') as file:
+                for row in csv.DictReader(file):
+                    point = (float(row['latitude']), float(row['longitude']))
+                    if row.get('zip'):
+                        zips[row['zip'].strip()] = point
+                    else:
+                        cities[city_key(row['city'], row['state'])] = point
+        return zips, cities
+
+    def _tables(self):
+        with self._lock:
+            if self._cities is None:
+                self._zips, self._cities = self._load()
+            return self._zips, self._cities
+
+    def locate(self, city, state, address = None):
+        """
+        (latitude, longitude) of a venue, or None when it cannot be placed
+        """
+        zips, cities = self._tables()
+        match = ZIP_AT_END.search(address or '')
+        if match and match.group(1) in zips:
+            return zips[match.group(1)]
+        return cities.get(city_key(city, state))
+
+geocoder = Geocoder()
+
+#----------------------------------------------------------------------------#
+# Geo cells
+#----------------------------------------------------------------------------#
+
+# Each venue's position is also stored as a geo cell: the bits of its
+# geohash (longitude and latitude halvings, interleaved, longitude first)
+# as an integer. Every cell of a coarser grid is then one range of these
+# integers, so the plain B-tree index on Venue.geocell finds the venues in
+# a few cells with a few range seeks, on SQLite and Postgres alike, with no
+# spatial extension.
+
+GEOCELL_BITS = 50
+
+# km per degree of latitude (mean Earth radius)
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+
+def axis_bits(bits):
+    """
+    Longitude and latitude bits in a cell key of this many bits
+    """
+    return (bits + 1) // 2, bits // 2
+
+def axis_index(value, low, span, bits):
+    return min(int((value - low) / span * (1 << bits)), (1 << bits) - 1)
+
+def interleave(lng_index, lat_index, bits):
+    lng_bits, lat_bits = axis_bits(bits)
+    value = 0
+    for position in range(bits):
+        if position % 2 == 0:
+            lng_bits -= 1
+            value = value << 1 | (lng_index >> lng_bits) & 1
+        else:
+            lat_bits -= 1
+            value = value << 1 | (lat_index >> lat_bits) & 1
+    return value
+
+def geocell(latitude, longitude):
+    lng_bits, lat_bits = axis_bits(GEOCELL_BITS)
+    return interleave(
+        axis_index(longitude, -180.0, 360.0, lng_bits),
+        axis_index(latitude, -90.0, 180.0, lat_bits),
+        GEOCELL_BITS
+    )
+
+def location_columns(latitude, longitude):
+    if latitude is None or longitude is None:
+        return { 'latitude': None, 'longitude': None, 'geocell': None }
+    return { 'latitude': latitude, 'longitude': longitude, 'geocell': geocell(latitude, longitude) }
+
+def locate_venue(venue):
+    """
+    Set a venue's coordinates and geo cell from its address, city and state
+    """
+    point = geocoder.locate(venue.city, venue.state, venue.address) or (None, None)
+    for column, value in location_columns(*point).items():
+        setattr(venue, column, value)
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    (south, north, west, east) around the circle, in degrees. Longitudes
+    are not wrapped, so west can be below -180 and east above 180
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    south, north = max(latitude - dlat, -90.0), min(latitude + dlat, 90.0)
+    widest = math.cos(math.radians(max(abs(south), abs(north))))
+    if widest <= 0 or dlat / widest >= 180:
+        return south, north, -180.0, 180.0
+    return south, north, longitude - dlat / widest, longitude + dlat / widest
+
+def covering_ranges(south, north, west, east):
+    """
+    Ranges [start, end) of geo cells that cover the box, using the finest
+    grid that needs at most GEO_MAX_CELLS cells; adjacent ranges are merged
+    """
+    limit = app.config['GEO_MAX_CELLS']
+    for bits in range(GEOCELL_BITS, 0, -1):
+        lng_bits, lat_bits = axis_bits(bits)
+        lng_span = 360.0 / (1 << lng_bits)
+        lat_indexes = range(axis_index(south, -90.0, 180.0, lat_bits), axis_index(north, -90.0, 180.0, lat_bits) + 1)
+        first, last = int(math.floor((west + 180.0) / lng_span)), int(math.floor((east + 180.0) / lng_span))
+        if len(lat_indexes) * min(last - first + 1, 1 << lng_bits) <= limit:
+            break
+
+    lng_indexes = { index % (1 << lng_bits) for index in range(first, last + 1) }
+    shift = GEOCELL_BITS - bits
+    starts = sorted(interleave(lng, lat, bits) for lng in lng_indexes for lat in lat_indexes)
+    ranges = []
+    for start in starts:
+        if ranges and ranges[-1][1] == start << shift:
+            ranges[-1][1] = (start + 1) << shift
+        else:
+            ranges.append([start << shift, (start + 1) << shift])
+    return ranges
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """
+    Great-circle (haversine) distance
+    """
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+#----------------------------------------------------------------------------#
+# Nearby venues
+#----------------------------------------------------------------------------#
+
+FIRST_RING_KM = 2
+
+def near_args(args):
+    """
+    (latitude, longitude, radius in km) from ?lat=&lng=&radius= request
+    arguments; the radius defaults to GEO_DEFAULT_RADIUS_KM and is capped at
+    GEO_MAX_RADIUS_KM. Raises ValueError when they are missing or out of range
+    """
+    latitude = args.get('lat', type = float)
+    longitude = args.get('lng', type = float)
+    radius = args.get('radius', app.config['GEO_DEFAULT_RADIUS_KM'], type = float)
+    if latitude is None or longitude is None or not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise ValueError('lat (-90 to 90) and lng (-180 to 180) are required.')
+    if not radius > 0:
+        raise ValueError('radius must be a positive number of km.')
+    return latitude, longitude, min(radius, app.config['GEO_MAX_RADIUS_KM'])
+
+def venues_within(latitude, longitude, radius_km, limit):
+    """
+    The geo cells covering the circle's bounding box narrow the search down
+    to the area; the database then ranks what they hold on a flat-earth
+    distance, which is close to the great-circle one at these radii, and
+    returns the nearest limit rows, whose exact distances are computed here
+    """
+    south, north, west, east = bounding_box(latitude, longitude, radius_km)
+    ranges = covering_ranges(south, north, west, east)
+    query = db.session.query(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state,
+        Venue.latitude,
+        Venue.longitude
+    ).filter(
+        or_(*[and_(Venue.geocell >= start, Venue.geocell < end) for start, end in ranges])
+    )
+    # Across the antimeridian the flat distance does not hold, and every
+    # venue in the cells is measured here instead
+    if -180.0 < west and east < 180.0:
+        scale = math.cos(math.radians(latitude))
+        flat = (Venue.latitude - latitude) * (Venue.latitude - latitude) + \
+            (Venue.longitude - longitude) * (Venue.longitude - longitude) * scale * scale
+        # 5% slack for the flat distance's error; the exact check follows
+        reach = radius_km / KM_PER_DEGREE * 1.05
+        query = query.filter(flat <= reach * reach).order_by(flat, Venue.id).limit(limit)
+
+    nearby = []
+    for row in query:
+        distance = distance_km(latitude, longitude, row.latitude, row.longitude)
+        if distance <= radius_km:
+            nearby.append((distance, row))
+    nearby.sort(key = lambda item: (item[0], item[1].id))
+    return nearby[:limit]
+
+def venues_near(latitude, longitude, radius_km, limit):
+    """
+    The venues within radius_km of a point, nearest first, at most limit of
+    them, as (distance in km, row of id, name, city, state, latitude,
+    longitude) pairs.
+
+    The circle searched starts at FIRST_RING_KM and grows until it holds
+    limit venues, by how many it held so far, so in a dense area the
+    nearest venues are found without ranking every venue within radius_km
+    """
+    reach = min(FIRST_RING_KM, radius_km)
+    while True:
+        nearby = venues_within(latitude, longitude, reach, limit)
+        if len(nearby) >= limit or reach >= radius_km:
+            return nearby
+        # Venues found grow with the area, the square of the radius
+        growth = 1.25 * math.sqrt(limit / len(nearby)) if nearby else 4
+        reach = min(reach * min(max(growth, 1.5), 4), radius_km)
+
+#----------------------------------------------------------------------------#
+# Backfill
+#----------------------------------------------------------------------------#
+
+def geocode_venues(batch_size, everything = False):
+    """
+    Place the venues without coordinates (or every venue), batch_size rows
+    per update and commit. Returns (venues placed, venues not found)
+    """
+    placed = missed = 0
+    after = 0
+    while True:
+        query = db.session.query(Venue.id, Venue.city, Venue.state, Venue.address).filter(Venue.id > after)
+        if not everything:
+            query = query.filter(Venue.geocell.is_(None))
+        rows = query.order_by(Venue.id).limit(batch_size).all()
+        if not rows:
+            return placed, missed
+        updates = []
+        for row in rows:
+            point = geocoder.locate(row.city, row.state, row.address)
+            if point is None:
+                missed += 1
+                if not everything:
+                    continue
+            else:
+                placed += 1
+            updates.append(dict(location_columns(*(point or (None, None))), venue_id = row.id))
+        if updates:
+            table = Venue.__table__
+            db.session.execute(
+                table.update().where(table.c.id == db.bindparam('venue_id')),
+                updates
+            )
+        db.session.commit()
+        after = rows[-1].id
+
+@click.command('geocode')
+@click.option('--all', 'everything', is_flag = True, help = 'Place every venue again, not only those without coordinates.')
+@click.option('--batch-size', type = int, help = 'Rows per update and commit (IMPORT_BATCH_SIZE).')
+@with_appcontext
+def geocode_command(everything, batch_size):
+    """
+    Set venue coordinates from the centroid tables (GEO_CENTROID_FILES),
+    e.g. after upgrading the database or adding a table.
+    """
+    placed, missed = geocode_venues(batch_size or app.config['IMPORT_BATCH_SIZE'], everything)
+    click.echo('Placed %d venues, %d not found in the centroid tables.' % (placed, missed))
@@ -0,0 +1,476 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import csv
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+from itertools import islice
+import click
+import dateutil.parser
+from flask.cli import with_appcontext
+from sqlalchemy import func, text
+from models import app, db, Venue, Artist, Show, Genre, venue_genre_relationship, artist_genre_relationship
+from genres import genre_registry
+from utils import slugify
+from feed import rebuild_feed
+from geo import geocoder, location_columns
+
+#----------------------------------------------------------------------------#
+# Bulk import
+#----------------------------------------------------------------------------#
+
+# `flask import` loads genres, venues, artists or shows from CSV or NDJSON files
+# (optionally gzipped). Records are read as a stream and written
+# IMPORT_BATCH_SIZE at a time: each batch resolves its genres and
+# references with one query per kind, goes to the database as a single
+# executemany per table and is committed, so memory use does not grow with
+# the size of the file.
+
+ENTITY_FIELDS = {
+    Venue: ('name', 'city', 'state', 'address', 'phone', 'website', 'image_link',
+            'facebook_link', 'seeking_talent', 'seeking_description'),
+    Artist: ('name', 'city', 'state', 'phone', 'website', 'image_link',
+             'facebook_link', 'seeking_venues', 'seeking_description'),
+}
+
+GENRE_LINKS = {
+    Venue: (venue_genre_relationship, 'venue_id'),
+    Artist: (artist_genre_relationship, 'artist_id'),
+}
+
+BOOLEAN_FIELDS = ('seeking_talent', 'seeking_venues')
+
+MAX_REPORTED_ERRORS = 20
+
+class RecordError(ValueError):
+    pass
+
+# Readers
+
+def read_records(path, format = None):
+    """
+    Yield (line number, record) for every record in a CSV or NDJSON file.
+    The format defaults to the file extension; a .gz suffix is decompressed
+    on the fly. NDJSON records are yielded unparsed so a bad line only
+    rejects that record.
+    """
+    name = path[:-3] if path.endswith('.gz') else path
+    format = format or ('csv' if name.endswith('.csv') else 'ndjson')
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding = 'utf-8', newline = '') as file:
+        if format == 'csv':
+            for number, record in enumerate(csv.DictReader(file), 2):
+                yield number, record
+        else:
+            for number, line in enumerate(file, 1):
+                if line.strip():
+                    yield number, line
+
+def batched(records, size):
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+# Field parsing
+
+def as_record(raw):
+    if not isinstance(raw, str):
+        return raw
+    try:
+        record = json.loads(raw)
+    except ValueError as error:
+        raise RecordError('invalid JSON (%s)' % error)
+    if not isinstance(record, dict):
+        raise RecordError('expected a JSON object')
+    return record
+
+def clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value == '' else value
+
+def as_boolean(value):
+    if value is None or isinstance(value, bool):
+        return bool(value)
+    return str(value).strip().lower() in ('1', 'true', 't', 'yes', 'y')
+
+def as_id(value, field):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RecordError('%s must be an integer' % field)
+
+def as_datetime(value, field = 'start_time'):
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            try:
+                return dateutil.parser.parse(value)
+            except (ValueError, OverflowError):
+                pass
+    raise RecordError('%s is not a date and time' % field)
+
+def as_coordinate(value, field, bound):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise RecordError('%s must be a number' % field)
+    if not -bound <= value <= bound:
+        raise RecordError('%s must be between -%d and %d' % (field, bound, bound))
+    return value
+
+# Venues keep the coordinates they come with (as in an export) and are
+# otherwise placed from the centroid tables
+
+def venue_location(record, row):
+    latitude, longitude = clean(record.get('latitude')), clean(record.get('longitude'))
+    if latitude is not None and longitude is not None:
+        point = (as_coordinate(latitude, 'latitude', 90), as_coordinate(longitude, 'longitude', 180))
+    else:
+        point = geocoder.locate(row['city'], row['state'], row['address']) or (None, None)
+    return location_columns(*point)
+
+# Exports carry each row's updated_at; rows without one are stamped now
+
+def updated_at(record):
+    value = clean(record.get('updated_at'))
+    return datetime.utcnow() if value is None else as_datetime(value, 'updated_at')
+
+# Genres are given by slug or name, as a JSON list or a comma or semicolon
+# separated CSV cell
+
+def genre_names(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.replace(';', ',').split(',')
+    return [str(genre).strip() for genre in value if str(genre).strip()]
+
+def parse_entity(model, record):
+    row = { field: clean(record.get(field)) for field in ENTITY_FIELDS[model] }
+    if not row['name']:
+        raise RecordError('name is required')
+    for field in BOOLEAN_FIELDS:
+        if field in row:
+            row[field] = as_boolean(row[field])
+    # A snapshot's slug is kept as it was, even when empty
+    row['slug'] = clean(record['slug']) if 'slug' in record else slugify(row['name'])
+    row['updated_at'] = updated_at(record)
+    # Text columns that are NOT NULL (the listings' sort keys) take '' for
+    # a missing value
+    for column in model.__table__.columns:
+        if row.get(column.name, '') is None and not column.nullable:
+            row[column.name] = ''
+    if model is Venue:
+        row.update(venue_location(record, row))
+    if clean(record.get('id')) is not None:
+        row['id'] = as_id(record['id'], 'id')
+    return row, genre_names(record.get('genres'))
+
+def parse_genre(record):
+    name = clean(record.get('name'))
+    if not name:
+        raise RecordError('name is required')
+    row = { 'name': name, 'slug': clean(record.get('slug')) or slugify(name) }
+    if clean(record.get('id')) is not None:
+        row['id'] = as_id(record['id'], 'id')
+    return row
+
+# References to an artist or venue are its id (artist_id / venue_id) or
+# its name or slug (artist / venue)
+
+def parse_reference(record, kind):
+    if clean(record.get(kind + '_id')) is not None:
+        return as_id(record[kind + '_id'], kind + '_id')
+    name = clean(record.get(kind))
+    if name is None:
+        raise RecordError('%s_id or %s is required' % (kind, kind))
+    return slugify(str(name))
+
+def parse_show(record):
+    row = {
+        'artist_id': parse_reference(record, 'artist'),
+        'venue_id': parse_reference(record, 'venue'),
+        'start_time': as_datetime(clean(record.get('start_time'))),
+        'updated_at': updated_at(record),
+    }
+    if clean(record.get('id')) is not None:
+        row['id'] = as_id(record['id'], 'id')
+    return row
+
+# Resolution, one query per kind and batch
+
+def resolve_genres(names, create):
+    """
+    Map genre slugs or names to ids through the genre registry, matching a
+    name on slugify() like the genre seed does. With create set, unknown
+    genres are inserted first.
+    """
+    def lookup():
+        known = { genre.slug: genre.id for genre in genre_registry.all() }
+        resolved = {}
+        for name in set(names):
+            genre_id = known.get(name, known.get(slugify(name)))
+            if genre_id is not None:
+                resolved[name] = genre_id
+        return resolved
+
+    resolved = lookup()
+    unknown = { slugify(name): name for name in set(names) - set(resolved) }
+    if unknown and create:
+        db.session.execute(Genre.__table__.insert(), [
+            { 'name': name, 'slug': slug } for slug, name in sorted(unknown.items())
+        ])
+        genre_registry.invalidate()
+        resolved = lookup()
+    return resolved
+
+def resolve_references(model, references):
+    ids = { reference for reference in references if isinstance(reference, int) }
+    slugs = { reference for reference in references if isinstance(reference, str) }
+    resolved = {}
+    if ids:
+        resolved.update((id, id) for (id,) in db.session.query(model.id).filter(model.id.in_(ids)))
+    if slugs:
+        resolved.update(db.session.query(model.slug, func.min(model.id)).filter(
+            model.slug.in_(slugs)
+        ).group_by(model.slug))
+    return resolved
+
+class IdAllocator:
+    """
+    Hands out primary keys before the insert so genre links can be written
+    in the same batch. PostgreSQL draws them from the table's sequence;
+    other databases count up from max(id), which assumes nothing else
+    writes to the table during the import.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.postgres = db.engine.dialect.name == 'postgresql'
+        self.next_id = None
+
+    def _start(self):
+        if self.next_id is None:
+            self.next_id = (db.session.query(func.max(self.table.c.id)).scalar() or 0) + 1
+
+    def allocate(self, count):
+        if self.postgres:
+            rows = db.session.execute(
+                text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"),
+                { 'table': '"%s"' % self.table.name, 'count': count }
+            )
+            return [id for (id,) in rows]
+        self._start()
+        ids = list(range(self.next_id, self.next_id + count))
+        self.next_id += count
+        return ids
+
+    def reserve(self, ids):
+        """
+        Record ids given in the file so allocated ones stay clear of them.
+        Call it before allocating the batch's other ids
+        """
+        if self.postgres:
+            # nextval() also reads the sequence's position, at the cost of one
+            # unused value; the next id allocated is then past both
+            db.session.execute(
+                text("SELECT setval(pg_get_serial_sequence(:table, 'id'), GREATEST(:reserved, nextval(pg_get_serial_sequence(:table, 'id'))))"),
+                { 'table': '"%s"' % self.table.name, 'reserved': max(ids) }
+            )
+            return
+        self._start()
+        self.next_id = max(self.next_id, max(ids) + 1)
+
+# Progress
+
+class Progress:
+
+    def __init__(self, label):
+        self.label = label
+        self.rows = 0
+        self.skipped = 0
+        self.started = time.perf_counter()
+
+    def rate(self):
+        return self.rows / max(time.perf_counter() - self.started, 1e-9)
+
+    def add(self, count):
+        self.rows += count
+        click.echo('%s: %d rows (%.0f rows/s)' % (self.label, self.rows, self.rate()))
+
+    def skip(self, number, error):
+        self.skipped += 1
+        if self.skipped <= MAX_REPORTED_ERRORS:
+            click.echo('line %d: %s' % (number, error), err = True)
+
+    def finish(self):
+        elapsed = time.perf_counter() - self.started
+        click.echo('Imported %d %s in %.1fs (%.0f rows/s), skipped %d.' % (
+            self.rows, self.label, elapsed, self.rate(), self.skipped
+        ))
+
+# Importers
+
+def import_genres(records, batch_size):
+    allocator = IdAllocator(Genre.__table__)
+    progress = Progress('genres')
+
+    for batch in batched(records, batch_size):
+        known = { genre.slug for genre in genre_registry.all() }
+        with_id, without_id = [], []
+        for number, raw in batch:
+            try:
+                row = parse_genre(as_record(raw))
+            except RecordError as error:
+                progress.skip(number, error)
+                continue
+            if row['slug'] in known:
+                progress.skip(number, 'genre %s already exists' % row['slug'])
+                continue
+            known.add(row['slug'])
+            (with_id if 'id' in row else without_id).append(row)
+
+        if with_id:
+            allocator.reserve([row['id'] for row in with_id])
+            db.session.execute(Genre.__table__.insert(), with_id)
+        if without_id:
+            db.session.execute(Genre.__table__.insert(), without_id)
+        db.session.commit()
+        genre_registry.invalidate()
+        progress.add(len(with_id) + len(without_id))
+
+    progress.finish()
+    return progress
+
+def import_entities(model, records, batch_size, create_genres = False):
+    table = model.__table__
+    links, foreign_key = GENRE_LINKS[model]
+    allocator = IdAllocator(table)
+    progress = Progress(table.name.lower() + 's')
+
+    for batch in batched(records, batch_size):
+        parsed = []
+        for number, raw in batch:
+            try:
+                parsed.append((number,) + parse_entity(model, as_record(raw)))
+            except RecordError as error:
+                progress.skip(number, error)
+
+        genre_ids = resolve_genres([name for _, _, names in parsed for name in names], create_genres)
+        rows, genre_rows = [], []
+        for number, row, names in parsed:
+            unknown = [name for name in names if name not in genre_ids]
+            if unknown:
+                progress.skip(number, 'unknown genres: ' + ', '.join(unknown))
+                continue
+            rows.append((row, names))
+
+        explicit = [row['id'] for row, _ in rows if 'id' in row]
+        if explicit:
+            allocator.reserve(explicit)
+        missing = [row for row, _ in rows if 'id' not in row]
+        for row, id in zip(missing, allocator.allocate(len(missing)) if missing else []):
+            row['id'] = id
+        for row, names in rows:
+            genre_rows.extend({ 'genre_id': genre_ids[name], foreign_key: row['id'] } for name in names)
+
+        if rows:
+            db.session.execute(table.insert(), [row for row, _ in rows])
+        if genre_rows:
+            db.session.execute(links.insert(), genre_rows)
+        db.session.commit()
+        progress.add(len(rows))
+
+    progress.finish()
+    return progress
+
+def import_shows(records, batch_size):
+    table = Show.__table__
+    allocator = IdAllocator(table)
+    progress = Progress('shows')
+
+    for batch in batched(records, batch_size):
+        parsed = []
+        for number, raw in batch:
+            try:
+                parsed.append((number, parse_show(as_record(raw))))
+            except RecordError as error:
+                progress.skip(number, error)
+
+        artists = resolve_references(Artist, [row['artist_id'] for _, row in parsed])
+        venues = resolve_references(Venue, [row['venue_id'] for _, row in parsed])
+        with_id, without_id = [], []
+        for number, row in parsed:
+            if row['artist_id'] not in artists:
+                progress.skip(number, 'unknown artist %s' % row['artist_id'])
+            elif row['venue_id'] not in venues:
+                progress.skip(number, 'unknown venue %s' % row['venue_id'])
+            else:
+                row['artist_id'] = artists[row['artist_id']]
+                row['venue_id'] = venues[row['venue_id']]
+                (with_id if 'id' in row else without_id).append(row)
+
+        # executemany needs the same columns in every row
+        if with_id:
+            allocator.reserve([row['id'] for row in with_id])
+            db.session.execute(table.insert(), with_id)
+        if without_id:
+            db.session.execute(table.insert(), without_id)
+        db.session.commit()
+        progress.add(len(with_id) + len(without_id))
+
+    progress.finish()
+    return progress
+
+# A snapshot written by `flask export` is restored file by file, genres
+# first so that venues and artists can link to them
+
+SNAPSHOT_FILES = ('genres', 'venues', 'artists', 'shows')
+
+def import_file(kind, path, batch_size, format = None, create_genres = False):
+    records = read_records(path, format)
+    if kind == 'genres':
+        return import_genres(records, batch_size)
+    if kind == 'shows':
+        return import_shows(records, batch_size)
+    return import_entities(Venue if kind == 'venues' else Artist, records, batch_size, create_genres)
+
+def import_snapshot(directory, batch_size):
+    for kind in SNAPSHOT_FILES:
+        path = os.path.join(directory, kind + '.ndjson.gz')
+        if os.path.exists(path):
+            import_file(kind, path, batch_size)
+
+@click.command('import')
+@click.argument('kind', type = click.Choice(['genres', 'venues', 'artists', 'shows', 'snapshot']))
+@click.argument('path', type = click.Path(exists = True))
+@click.option('--format', type = click.Choice(['csv', 'ndjson']), help = 'File format, by default taken from the extension.')
+@click.option('--batch-size', type = int, help = 'Rows per insert and commit (IMPORT_BATCH_SIZE).')
+@click.option('--create-genres', is_flag = True, help = 'Add genres that do not exist yet instead of skipping their rows.')
+@with_appcontext
+def import_command(kind, path, format, batch_size, create_genres):
+    """
+    Bulk load genres, venues, artists or shows from a CSV or NDJSON file,
+    or every file of a `flask export` snapshot directory.
+    """
+    batch_size = batch_size or app.config['IMPORT_BATCH_SIZE']
+    if kind == 'snapshot':
+        if not os.path.isdir(path):
+            raise click.BadParameter('a snapshot is a directory written by flask export', param_hint = 'PATH')
+        import_snapshot(path, batch_size)
+    else:
+        if os.path.isdir(path):
+            raise click.BadParameter('%s are imported from a file' % kind, param_hint = 'PATH')
+        import_file(kind, path, batch_size, format, create_genres)
+    # Imported shows bypass the handlers that keep the feed up to date
+    if kind in ('shows', 'snapshot'):
+        click.echo('Feed rebuilt with %d upcoming shows.' % rebuild_feed())
@@ -0,0 +1,29 @@
+"""updated_at on venue, artist and show
+
+Revision ID: 279e25fd8d89
+Revises: 31d937ec8daa
+Create Date: 2026-10-18 11:24:05.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '279e25fd8d89'
+down_revision = '31d937ec8daa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist', 'Show'):
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text("(now() at time zone 'utc')")))
+        op.alter_column(table, 'updated_at', server_default=None)
+        op.create_index(op.f('ix_%s_updated_at' % table), table, ['updated_at'], unique=False)
+
+
+def downgrade():
+    for table in ('Show', 'Artist', 'Venue'):
+        op.drop_index(op.f('ix_%s_updated_at' % table), table_name=table)
+        op.drop_column(table, 'updated_at')
@@ -0,0 +1,40 @@
+"""show, venue, artist and genre lookup indexes
+
+Revision ID: 31d937ec8daa
+Revises: 4949abb02e71
+Create Date: 2026-10-18 10:02:17.554931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '31d937ec8daa'
+down_revision = '4949abb02e71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_show_venue_id_start_time', 'Show', ['venue_id', 'start_time', 'id'], unique=False)
+    op.create_index('ix_show_artist_id_start_time', 'Show', ['artist_id', 'start_time', 'id'], unique=False)
+    op.create_index('ix_show_start_time', 'Show', ['start_time', 'id'], unique=False)
+    op.create_index('ix_venue_state_city', 'Venue', ['state', 'city', 'name', 'id'], unique=False)
+    op.create_index('ix_artist_name', 'Artist', ['name', 'id'], unique=False)
+    op.create_index('ix_venue_genre_venue_id', 'venue_genre_relationship', ['venue_id', 'genre_id'], unique=False)
+    op.create_index('ix_venue_genre_genre_id', 'venue_genre_relationship', ['genre_id'], unique=False)
+    op.create_index('ix_artist_genre_artist_id', 'artist_genre_relationship', ['artist_id', 'genre_id'], unique=False)
+    op.create_index('ix_artist_genre_genre_id', 'artist_genre_relationship', ['genre_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_artist_genre_genre_id', table_name='artist_genre_relationship')
+    op.drop_index('ix_artist_genre_artist_id', table_name='artist_genre_relationship')
+    op.drop_index('ix_venue_genre_genre_id', table_name='venue_genre_relationship')
+    op.drop_index('ix_venue_genre_venue_id', table_name='venue_genre_relationship')
+    op.drop_index('ix_artist_name', table_name='Artist')
+    op.drop_index('ix_venue_state_city', table_name='Venue')
+    op.drop_index('ix_show_start_time', table_name='Show')
+    op.drop_index('ix_show_artist_id_start_time', table_name='Show')
+    op.drop_index('ix_show_venue_id_start_time', table_name='Show')
@@ -0,0 +1,53 @@
+"""upcoming shows feed
+
+Revision ID: 8b3e0c6d41a7
+Revises: 279e25fd8d89
+Create Date: 2026-10-18 14:02:37.551820
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b3e0c6d41a7'
+down_revision = '279e25fd8d89'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('UpcomingShowFeed',
+    sa.Column('show_id', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('venue_name', sa.String(), nullable=True),
+    sa.Column('venue_image_link', sa.String(length=500), nullable=True),
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('artist_name', sa.String(), nullable=True),
+    sa.Column('artist_image_link', sa.String(length=500), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['show_id'], ['Show.id'], ondelete='cascade'),
+    sa.PrimaryKeyConstraint('show_id')
+    )
+    op.create_index('ix_upcoming_show_feed_start_time', 'UpcomingShowFeed', ['start_time', 'show_id'], unique=False)
+    op.create_index(op.f('ix_UpcomingShowFeed_venue_id'), 'UpcomingShowFeed', ['venue_id'], unique=False)
+    op.create_index(op.f('ix_UpcomingShowFeed_artist_id'), 'UpcomingShowFeed', ['artist_id'], unique=False)
+    op.create_index(op.f('ix_UpcomingShowFeed_updated_at'), 'UpcomingShowFeed', ['updated_at'], unique=False)
+    # Fill the feed with the shows from today on (`flask feed rebuild` does the same)
+    op.execute('''
+        INSERT INTO "UpcomingShowFeed" (show_id, start_time, venue_id, venue_name, venue_image_link, artist_id, artist_name, artist_image_link, updated_at)
+        SELECT s.id, s.start_time, s.venue_id, v.name, v.image_link, s.artist_id, a.name, a.image_link, now() at time zone 'utc'
+        FROM "Show" s
+        JOIN "Venue" v ON v.id = s.venue_id
+        JOIN "Artist" a ON a.id = s.artist_id
+        WHERE s.start_time >= current_date
+    ''')
+
+
+def downgrade():
+    op.drop_index(op.f('ix_UpcomingShowFeed_updated_at'), table_name='UpcomingShowFeed')
+    op.drop_index(op.f('ix_UpcomingShowFeed_artist_id'), table_name='UpcomingShowFeed')
+    op.drop_index(op.f('ix_UpcomingShowFeed_venue_id'), table_name='UpcomingShowFeed')
+    op.drop_index('ix_upcoming_show_feed_start_time', table_name='UpcomingShowFeed')
+    op.drop_table('UpcomingShowFeed')
@@ -0,0 +1,31 @@
+"""venue coordinates and geo cell
+
+Revision ID: c4f1a9e27b53
+Revises: 8b3e0c6d41a7
+Create Date: 2026-10-18 16:40:12.208413
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f1a9e27b53'
+down_revision = '8b3e0c6d41a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Venue', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('Venue', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('Venue', sa.Column('geocell', sa.BigInteger(), nullable=True))
+    op.create_index(op.f('ix_Venue_geocell'), 'Venue', ['geocell'], unique=False)
+    # Existing venues are placed by `flask geocode`, from the centroid tables
+
+
+def downgrade():
+    op.drop_index(op.f('ix_Venue_geocell'), table_name='Venue')
+    op.drop_column('Venue', 'geocell')
+    op.drop_column('Venue', 'longitude')
+    op.drop_column('Venue', 'latitude')
@@ -0,0 +1,26 @@
+"""trigram indexes on venue and artist state
+
+Revision ID: e6a2d8b05c19
+Revises: c4f1a9e27b53
+Create Date: 2026-10-18 18:12:45.930214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a2d8b05c19'
+down_revision = 'c4f1a9e27b53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_venue_state_trgm', 'Venue', ['state'], unique=False, postgresql_using='gin', postgresql_ops={'state': 'gin_trgm_ops'})
+    op.create_index('ix_artist_state_trgm', 'Artist', ['state'], unique=False, postgresql_using='gin', postgresql_ops={'state': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_artist_state_trgm', table_name='Artist')
+    op.drop_index('ix_venue_state_trgm', table_name='Venue')
@@ -0,0 +1,39 @@
+"""listing sort keys not null
+
+Revision ID: f3b7c1d94e28
+Revises: e6a2d8b05c19
+Create Date: 2026-10-18 18:48:03.117562
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b7c1d94e28'
+down_revision = 'e6a2d8b05c19'
+branch_labels = None
+depends_on = None
+
+# Keyset pages compare row values, which never match a null, so rows with
+# a null sort key column dropped out of the listings
+
+COLUMNS = (
+    ('Venue', 'name', sa.String()),
+    ('Venue', 'city', sa.String(length=120)),
+    ('Venue', 'state', sa.String(length=120)),
+    ('Artist', 'name', sa.String()),
+)
+
+
+def upgrade():
+    for table, column, type_ in COLUMNS:
+        op.execute('UPDATE "%s" SET %s = \'\' WHERE %s IS NULL' % (table, column, column))
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=type_, nullable=False)
+
+
+def downgrade():
+    for table, column, type_ in COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=type_, nullable=True)
@@ -2,10 +2,11 @@
 # Imports
 #----------------------------------------------------------------------------#
 
-from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
 from flask_migrate import Migrate
 from flask_moment import Moment
 from app import app
+from database import Database, init_database
 
 #----------------------------------------------------------------------------#
 # App Config.
@@ -13,8 +14,16 @@ from app import app
 
 moment = Moment(app)
 app.config.from_object('config')
-db = SQLAlchemy(app)
+db = Database(app)
 migrate = Migrate(app, db)
+init_database(app, db)
+
+# Relationships load lazily on first access ('select') and each view asks
+# for exactly what its template needs with loader options (selectinload,
+# joinedload, raiseload). With RAISE_ON_LAZY_LOAD set, as in tests, the
+# default becomes 'raise' so any load a view did not plan for is an error.
+
+DEFAULT_LAZY = 'raise' if app.config.get('RAISE_ON_LAZY_LOAD') else 'select'
 
 #----------------------------------------------------------------------------#
 # Models.
@@ -24,6 +33,9 @@ migrate = Migrate(app, db)
 
 class Genre(db.Model):
   __tablename__ = 'Genre'
+  __table_args__ = (
+    db.Index('ix_genre_name_trgm', 'name', postgresql_using = 'gin', postgresql_ops = { 'name': 'gin_trgm_ops' }),
+  )
 
   id = db.Column(db.Integer, primary_key = True)
   name = db.Column(db.String(), nullable = False)
@@ -33,23 +45,35 @@ class Genre(db.Model):
 venue_genre_relationship = db.Table('venue_genre_relationship',
     db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id')),
     db.Column('venue_id', db.Integer, db.ForeignKey('Venue.id', ondelete = 'cascade')),
-    db.Column('id', db.Integer, primary_key = True)
+    db.Column('id', db.Integer, primary_key = True),
+    db.Index('ix_venue_genre_venue_id', 'venue_id', 'genre_id'),
+    db.Index('ix_venue_genre_genre_id', 'genre_id')
 )
 
 # Creating relationship to connect Genre categories to Artist table
 artist_genre_relationship = db.Table('artist_genre_relationship',
     db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id')),
     db.Column('artist_id', db.Integer, db.ForeignKey('Artist.id', ondelete = 'cascade')),
-    db.Column('id', db.Integer, primary_key = True)
+    db.Column('id', db.Integer, primary_key = True),
+    db.Index('ix_artist_genre_artist_id', 'artist_id', 'genre_id'),
+    db.Index('ix_artist_genre_genre_id', 'genre_id')
 )
 
 class Venue(db.Model):
     __tablename__ = 'Venue'
+    __table_args__ = (
+      db.Index('ix_venue_name_trgm', 'name', postgresql_using = 'gin', postgresql_ops = { 'name': 'gin_trgm_ops' }),
+      db.Index('ix_venue_city_trgm', 'city', postgresql_using = 'gin', postgresql_ops = { 'city': 'gin_trgm_ops' }),
+      db.Index('ix_venue_state_trgm', 'state', postgresql_using = 'gin', postgresql_ops = { 'state': 'gin_trgm_ops' }),
+      # Serves the venue directory, which is ordered and paged on this key
+      db.Index('ix_venue_state_city', 'state', 'city', 'name', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key = True)
-    name = db.Column(db.String)
-    city = db.Column(db.String(120))
-    state = db.Column(db.String(120))
+    # name, city and state are the directory's sort key, so never null
+    name = db.Column(db.String, nullable = False, default = '')
+    city = db.Column(db.String(120), nullable = False, default = '')
+    state = db.Column(db.String(120), nullable = False, default = '')
     address = db.Column(db.String(120))
     phone = db.Column(db.String(120))
     website = db.Column(db.String(120))
@@ -58,16 +82,22 @@ class Venue(db.Model):
     seeking_talent = db.Column(db.Boolean(), default = False)
     seeking_description = db.Column(db.String(500))
     slug = db.Column(db.String(120))
+    # Set by geo.locate_venue; geocell indexes the position for /venues/near
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geocell = db.Column(db.BigInteger, index = True)
+    # Read pages derive their ETag and Last-Modified from this
+    updated_at = db.Column(db.DateTime, nullable = False, default = datetime.utcnow, onupdate = datetime.utcnow, index = True)
     genres = db.relationship(
       'Genre', 
       secondary = venue_genre_relationship,
-      lazy = 'subquery',
-      backref = db.backref('Venue', lazy = True)
+      lazy = DEFAULT_LAZY,
+      backref = db.backref('Venue', lazy = DEFAULT_LAZY)
     )
     shows = db.relationship(
       'Show',
-      lazy = 'subquery',
-      backref = db.backref('Venue', lazy=True)
+      lazy = DEFAULT_LAZY,
+      backref = db.backref('Venue', lazy = DEFAULT_LAZY)
     )
 
     def __repr__(self):
@@ -81,6 +111,8 @@ class Venue(db.Model):
         'city': self.city,
         'state': self.state,
         'address': self.address,
+        'latitude': self.latitude,
+        'longitude': self.longitude,
         'phone': self.phone,
         'genres': self.genres,
         'image_link': self.image_link,
@@ -92,9 +124,16 @@ class Venue(db.Model):
 
 class Artist(db.Model):
     __tablename__ = 'Artist'
+    __table_args__ = (
+      db.Index('ix_artist_name_trgm', 'name', postgresql_using = 'gin', postgresql_ops = { 'name': 'gin_trgm_ops' }),
+      db.Index('ix_artist_city_trgm', 'city', postgresql_using = 'gin', postgresql_ops = { 'city': 'gin_trgm_ops' }),
+      db.Index('ix_artist_state_trgm', 'state', postgresql_using = 'gin', postgresql_ops = { 'state': 'gin_trgm_ops' }),
+      db.Index('ix_artist_name', 'name', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key = True)
-    name = db.Column(db.String)
+    # The artist list's sort key, so never null
+    name = db.Column(db.String, nullable = False, default = '')
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     phone = db.Column(db.String(120))
@@ -104,16 +143,17 @@ class Artist(db.Model):
     seeking_venues = db.Column(db.Boolean(), default = False)
     seeking_description = db.Column(db.String(500))
     slug = db.Column(db.String(120))
+    updated_at = db.Column(db.DateTime, nullable = False, default = datetime.utcnow, onupdate = datetime.utcnow, index = True)
     genres = db.relationship(
       'Genre', 
       secondary = artist_genre_relationship,
-      lazy = 'subquery',
-      backref = db.backref('Artist', lazy = True)
+      lazy = DEFAULT_LAZY,
+      backref = db.backref('Artist', lazy = DEFAULT_LAZY)
     )
     shows = db.relationship(
       'Show',
-      lazy = 'subquery',
-      backref = db.backref('Artist', lazy = True)
+      lazy = DEFAULT_LAZY,
+      backref = db.backref('Artist', lazy = DEFAULT_LAZY)
     )
 
     def to_dict(self):
@@ -136,13 +176,21 @@ class Artist(db.Model):
 
 class Show(db.Model):
   __tablename__ = 'Show'
+  # Shows are always read by time, either across the site or for one venue
+  # or artist, and paged on (start_time, id)
+  __table_args__ = (
+    db.Index('ix_show_venue_id_start_time', 'venue_id', 'start_time', 'id'),
+    db.Index('ix_show_artist_id_start_time', 'artist_id', 'start_time', 'id'),
+    db.Index('ix_show_start_time', 'start_time', 'id'),
+  )
 
   id = db.Column(db.Integer, primary_key = True)
   start_time = db.Column(db.DateTime, nullable = False)
   artist_id = db.Column('artist_id', db.Integer, db.ForeignKey('Artist.id', ondelete = 'cascade'))
   venue_id = db.Column('venue_id', db.Integer, db.ForeignKey('Venue.id', ondelete = 'cascade'))
-  venue = db.relationship('Venue')
-  artist = db.relationship('Artist')
+  updated_at = db.Column(db.DateTime, nullable = False, default = datetime.utcnow, onupdate = datetime.utcnow, index = True)
+  venue = db.relationship('Venue', lazy = DEFAULT_LAZY)
+  artist = db.relationship('Artist', lazy = DEFAULT_LAZY)
 
   def with_venue(self):
     return {
@@ -159,4 +207,26 @@ class Show(db.Model):
       'artist_image_link': self.artist.image_link,
       'start_time': self.start_time.strftime('%Y-%m-%d %H:%M:%S')
     
-    }
\ No newline at end of file
+    }
+
+# Upcoming shows feed
+# One row per upcoming show with everything a /shows tile needs, kept up to
+# date by the handlers that create shows or edit and delete venues and
+# artists (see feed.py), so the listing reads one index range and joins
+# nothing. Shows that have started are pruned by `flask feed prune`.
+
+class UpcomingShowFeed(db.Model):
+  __tablename__ = 'UpcomingShowFeed'
+  __table_args__ = (
+    db.Index('ix_upcoming_show_feed_start_time', 'start_time', 'show_id'),
+  )
+
+  show_id = db.Column(db.Integer, db.ForeignKey('Show.id', ondelete = 'cascade'), primary_key = True)
+  start_time = db.Column(db.DateTime, nullable = False)
+  venue_id = db.Column(db.Integer, nullable = False, index = True)
+  venue_name = db.Column(db.String)
+  venue_image_link = db.Column(db.String(500))
+  artist_id = db.Column(db.Integer, nullable = False, index = True)
+  artist_name = db.Column(db.String)
+  artist_image_link = db.Column(db.String(500))
+  updated_at = db.Column(db.DateTime, nullable = False, default = datetime.utcnow, onupdate = datetime.utcnow, index = True)
@@ -0,0 +1,160 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import bisect
+import heapq
+import json
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from logging import Formatter, FileHandler
+from flask import g, request, jsonify, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+#----------------------------------------------------------------------------#
+# SQL instrumentation
+#----------------------------------------------------------------------------#
+
+# Opt-in with SQL_PROFILING. Every statement run while handling a request
+# is timed through SQLAlchemy's cursor events and added to that request's
+# RequestStats. The totals go out in a Server-Timing header and one JSON
+# line per request in SQL_PROFILING_LOG, and the last PERF_WINDOW requests
+# of each route are kept for /_debug/perf (PERF_ENDPOINT_ENABLED).
+
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+perf_logger = logging.getLogger('fyyur.perf')
+
+class RequestStats:
+
+    def __init__(self, slowest = 5):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.slowest = []
+        self._keep = slowest
+
+    def record(self, statement, elapsed, rowcount):
+        self.queries += 1
+        self.db_time += elapsed
+        # Drivers report -1 when they do not know (e.g. SQLite SELECTs)
+        if rowcount > 0:
+            self.rows += rowcount
+        entry = (elapsed, self.queries, ' '.join(statement.split())[:500])
+        if len(self.slowest) < self._keep:
+            heapq.heappush(self.slowest, entry)
+        else:
+            heapq.heappushpop(self.slowest, entry)
+
+    def summary(self):
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 3),
+            'rows': self.rows,
+            'slowest': [
+                { 'ms': round(elapsed * 1000, 3), 'statement': statement }
+                for elapsed, _, statement in sorted(self.slowest, reverse = True)
+            ],
+        }
+
+def current_stats():
+    return g.get('sql_stats') if has_request_context() else None
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    stats = current_stats()
+    if stats is not None:
+        stats.record(statement, elapsed, cursor.rowcount)
+
+def handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+# Rolling per-route samples
+
+class RouteHistograms:
+
+    def __init__(self, window):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen = window))
+
+    def add(self, route, duration_ms, queries, db_ms):
+        with self._lock:
+            self._samples[route].append((duration_ms, queries, db_ms))
+
+    @staticmethod
+    def percentile(values, percent):
+        return values[max(0, math.ceil(len(values) * percent / 100) - 1)]
+
+    def report(self):
+        with self._lock:
+            samples = { route: list(window) for route, window in self._samples.items() }
+        report = {}
+        for route, window in sorted(samples.items()):
+            durations = sorted(sample[0] for sample in window)
+            buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            for duration in durations:
+                buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, duration)] += 1
+            report[route] = {
+                'requests': len(window),
+                'p50_ms': round(self.percentile(durations, 50), 3),
+                'p95_ms': round(self.percentile(durations, 95), 3),
+                'p99_ms': round(self.percentile(durations, 99), 3),
+                'mean_queries': round(sum(sample[1] for sample in window) / len(window), 2),
+                'mean_db_ms': round(sum(sample[2] for sample in window) / len(window), 3),
+                'latency_histogram_ms': [
+                    { 'le': bound, 'count': count }
+                    for bound, count in zip(LATENCY_BUCKETS_MS + [None], buckets)
+                ],
+            }
+        return report
+
+def init_profiling(app):
+    histograms = RouteHistograms(app.config['PERF_WINDOW'])
+
+    event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', after_cursor_execute)
+    event.listen(Engine, 'handle_error', handle_error)
+
+    handler = FileHandler(app.config['SQL_PROFILING_LOG'])
+    handler.setFormatter(Formatter('%(message)s'))
+    perf_logger.setLevel(logging.INFO)
+    perf_logger.addHandler(handler)
+    perf_logger.propagate = False
+
+    @app.before_request
+    def start_request_stats():
+        g.sql_stats = RequestStats(app.config['SQL_PROFILING_SLOWEST'])
+
+    @app.after_request
+    def report_request_stats(response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+        duration_ms = (time.perf_counter() - stats.started) * 1000
+        summary = stats.summary()
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+
+        response.headers.add('Server-Timing', 'db;dur=%.3f;desc="%d queries"' % (summary['db_ms'], summary['queries']))
+        response.headers.add('Server-Timing', 'app;dur=%.3f' % duration_ms)
+        histograms.add(route, duration_ms, summary['queries'], summary['db_ms'])
+
+        record = dict(summary, route = route, method = request.method, status = response.status_code,
+                      duration_ms = round(duration_ms, 3), time = time.time())
+        # Statement text is only logged for slow queries
+        record['slowest'] = [entry for entry in summary['slowest'] if entry['ms'] >= app.config['SQL_SLOW_QUERY_MS']]
+        perf_logger.info(json.dumps(record))
+        return response
+
+    if app.config['PERF_ENDPOINT_ENABLED']:
+        app.add_url_rule('/_debug/perf', 'debug_perf', lambda: jsonify(histograms.report()))
@@ -0,0 +1,233 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import base64
+import json
+from datetime import datetime
+from itertools import groupby
+from sqlalchemy import DateTime, Integer, String, func, tuple_
+from models import db, Venue, Artist, Show, UpcomingShowFeed
+
+#----------------------------------------------------------------------------#
+# Keyset pagination
+#----------------------------------------------------------------------------#
+
+# Cursors are opaque url-safe tokens holding the sort key of the row a page
+# starts after (next) or ends before (prev). Seeking on the key instead of
+# using OFFSET keeps every page, however deep, an index range scan.
+
+def encode_cursor(values, direction = 'next'):
+    payload = json.dumps({
+        'k': [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        'd': direction
+    }, separators = (',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, keys):
+    """
+    Turn a cursor token back into (values, direction); raises ValueError when
+    the token is malformed or does not match the sort key
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values, direction = payload['k'], payload['d']
+    except (TypeError, KeyError, UnicodeError, ValueError) as error:
+        raise ValueError('Invalid cursor.') from error
+    if direction not in ('next', 'prev') or not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError('Invalid cursor.')
+    return [cursor_value(key, value) for key, value in zip(keys, values)], direction
+
+def cursor_value(key, value):
+    """
+    A cursor value checked against the type of its key column. Sort keys are
+    NOT NULL, so null is never a valid value either
+    """
+    if isinstance(key.type, DateTime) and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if isinstance(key.type, Integer) and isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(key.type, String) and isinstance(value, str):
+        return value
+    raise ValueError('Invalid cursor.')
+
+# Run a query one page at a time, ordered by the given key columns. The key
+# columns must be selected by the query, NOT NULL (a row-value comparison
+# never matches a null) and together be unique (end with id).
+
+def keyset_page(query, keys, cursor = None, limit = 50, descending = False):
+    direction = 'next'
+    if cursor:
+        values, direction = decode_cursor(cursor, keys)
+
+    # Walking backwards through an ascending listing (or forwards through a
+    # descending one) reads the index in descending key order.
+    ascending = (direction == 'next') != descending
+    if cursor:
+        if ascending:
+            query = query.filter(tuple_(*keys) > tuple_(*values))
+        else:
+            query = query.filter(tuple_(*keys) < tuple_(*values))
+
+    if ascending:
+        query = query.order_by(*keys)
+    else:
+        query = query.order_by(*[key.desc() for key in keys])
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == 'prev':
+        rows.reverse()
+
+    key_of = lambda row: [getattr(row, key.key) for key in keys]
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or direction == 'prev':
+            next_cursor = encode_cursor(key_of(rows[-1]), 'next')
+        if (has_more and direction == 'prev') or (cursor and direction == 'next'):
+            prev_cursor = encode_cursor(key_of(rows[0]), 'prev')
+
+    return {
+        'items': rows,
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor
+    }
+
+#----------------------------------------------------------------------------#
+# Queries
+#----------------------------------------------------------------------------#
+
+# Venue directory grouped by city and state
+# Loads only the columns the venues template uses in a single ordered query
+# and groups consecutive rows in Python, instead of one query per locale.
+# Pages are cut on the directory's own sort key so areas stay contiguous.
+
+def venue_directory(cursor = None, limit = 50):
+    query = db.session.query(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state
+    )
+    page = keyset_page(query, [Venue.state, Venue.city, Venue.name, Venue.id], cursor, limit)
+
+    areas = []
+    for (state, city), venues in groupby(page['items'], key = lambda row: (row.state, row.city)):
+        areas.append({
+            'city': city,
+            'state': state,
+            'venues': [{ 'id': venue.id, 'name': venue.name } for venue in venues]
+        })
+    page['items'] = areas
+    return page
+
+# Artist list ordered by name
+
+def artist_list(cursor = None, limit = 50):
+    query = db.session.query(
+        Artist.id,
+        Artist.name
+    )
+    page = keyset_page(query, [Artist.name, Artist.id], cursor, limit)
+    page['items'] = [{ 'id': artist.id, 'name': artist.name } for artist in page['items']]
+    return page
+
+# Upcoming shows with their venue and artist
+# Read from the upcoming shows feed, which already holds the fields the
+# show tiles need, so a page is one range scan of its (start_time, show_id)
+# index however many shows are listed.
+
+def upcoming_shows(since, cursor = None, limit = 50):
+    query = db.session.query(
+        UpcomingShowFeed.show_id,
+        UpcomingShowFeed.venue_id,
+        UpcomingShowFeed.venue_name,
+        UpcomingShowFeed.venue_image_link,
+        UpcomingShowFeed.artist_id,
+        UpcomingShowFeed.artist_name,
+        UpcomingShowFeed.artist_image_link,
+        UpcomingShowFeed.start_time
+    ).filter(
+        UpcomingShowFeed.start_time >= since
+    )
+    page = keyset_page(query, [UpcomingShowFeed.start_time, UpcomingShowFeed.show_id], cursor, limit)
+
+    page['items'] = [{
+        'venue_id': row.venue_id,
+        'venue_name': row.venue_name,
+        'venue_image_link': row.venue_image_link,
+        'artist_id': row.artist_id,
+        'artist_name': row.artist_name,
+        'artist_image_link': row.artist_image_link,
+        'start_time': row.start_time
+    } for row in page['items']]
+    return page
+
+#----------------------------------------------------------------------------#
+# Detail pages
+#----------------------------------------------------------------------------#
+
+# Past and upcoming show counts for one venue or artist, in one pass
+
+def show_counts(column, entity_id, now):
+    row = db.session.query(
+        func.count(Show.id).filter(Show.start_time < now).label('past'),
+        func.count(Show.id).filter(Show.start_time >= now).label('upcoming')
+    ).filter(
+        column == entity_id
+    ).one()
+    return row.past, row.upcoming
+
+# One page of a venue's or artist's shows joined to the counterpart.
+# Upcoming shows run soonest first and past shows most recent first.
+
+def shows_page(query, past, now, cursor, limit):
+    if past:
+        query = query.filter(Show.start_time < now)
+    else:
+        query = query.filter(Show.start_time >= now)
+    return keyset_page(query, [Show.start_time, Show.id], cursor, limit, descending = past)
+
+def shows_for_venue(venue_id, now, past = False, cursor = None, limit = 10):
+    query = db.session.query(
+        Show.id,
+        Show.start_time,
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link')
+    ).join(
+        Artist, Artist.id == Show.artist_id
+    ).filter(
+        Show.venue_id == venue_id
+    )
+    page = shows_page(query, past, now, cursor, limit)
+    page['items'] = [{
+        'artist_id': row.artist_id,
+        'artist_name': row.artist_name,
+        'artist_image_link': row.artist_image_link,
+        'start_time': row.start_time
+    } for row in page['items']]
+    return page
+
+def shows_for_artist(artist_id, now, past = False, cursor = None, limit = 10):
+    query = db.session.query(
+        Show.id,
+        Show.start_time,
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Venue.image_link.label('venue_image_link')
+    ).join(
+        Venue, Venue.id == Show.venue_id
+    ).filter(
+        Show.artist_id == artist_id
+    )
+    page = shows_page(query, past, now, cursor, limit)
+    page['items'] = [{
+        'venue_id': row.venue_id,
+        'venue_name': row.venue_name,
+        'venue_image_link': row.venue_image_link,
+        'start_time': row.start_time
+    } for row in page['items']]
+    return page
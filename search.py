@@ -0,0 +1,174 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import threading
+import time
+from collections import defaultdict
+from sqlalchemy import func, select, union
+from models import app, db, Venue, Artist, Genre, venue_genre_relationship, artist_genre_relationship
+from genres import genre_registry
+
+#----------------------------------------------------------------------------#
+# Search
+#----------------------------------------------------------------------------#
+
+# Venues and artists are matched on name, city, state and genre names, and
+# ranked by trigram similarity to the search term. On PostgreSQL this runs
+# against the pg_trgm GIN indexes; elsewhere (SQLite in development and
+# tests) an in-memory inverted trigram index answers the same queries.
+# Both return the total number of matches along with the best SEARCH_LIMIT.
+
+SEARCH_LIMIT = 100
+
+def trigrams(text):
+    return { text[i:i + 3] for i in range(len(text) - 2) }
+
+def similarity(term, text):
+    """
+    Trigram similarity between two lowercase strings, padded the way pg_trgm
+    pads words so the result is comparable to similarity() in Postgres
+    """
+    a = trigrams('  ' + term + ' ')
+    b = trigrams('  ' + text + ' ')
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+# Inverted trigram index over one entity type
+
+class InvertedIndex:
+
+    def __init__(self):
+        self.names = {}
+        self.texts = {}
+        self.postings = defaultdict(set)
+
+    def add(self, doc_id, name, fields):
+        self.names[doc_id] = name or ''
+        texts = [field.lower() for field in fields if field]
+        self.texts[doc_id] = texts
+        for text in texts:
+            for gram in trigrams(text):
+                self.postings[gram].add(doc_id)
+
+    def search(self, term, limit = SEARCH_LIMIT):
+        term = term.strip().lower()
+        grams = trigrams(term)
+        if grams:
+            # Every trigram of a substring match appears in the document, so
+            # intersect posting lists from the rarest one up.
+            lists = sorted((self.postings.get(gram, set()) for gram in grams), key = len)
+            candidates = set(lists[0])
+            for postings in lists[1:]:
+                candidates &= postings
+                if not candidates:
+                    break
+        else:
+            candidates = self.texts.keys()
+
+        hits = []
+        for doc_id in candidates:
+            texts = self.texts[doc_id]
+            if any(term in text for text in texts):
+                score = max(similarity(term, text) for text in texts) if term else 0.0
+                hits.append((-score, self.names[doc_id], doc_id))
+        hits.sort()
+        return len(hits), [{ 'id': doc_id, 'name': name } for _, name, doc_id in hits[:limit]]
+
+# The in-memory indexes are per process. Writes made here drop them at
+# once; at most every SEARCH_INDEX_TTL seconds a cheap stamp of each table
+# (row count, highest id, latest updated_at and genre link count) is
+# compared with the database to pick up writes made by other processes.
+
+_lock = threading.Lock()
+_indexes = {}
+
+def invalidate_search_index():
+    with _lock:
+        _indexes.clear()
+
+def build_index(model, relationship, foreign_key):
+    index = InvertedIndex()
+    genres = defaultdict(list)
+    rows = db.session.query(
+        relationship.c[foreign_key],
+        Genre.name
+    ).join(
+        Genre, Genre.id == relationship.c.genre_id
+    ).all()
+    for doc_id, genre in rows:
+        genres[doc_id].append(genre)
+
+    for row in db.session.query(model.id, model.name, model.city, model.state).all():
+        index.add(row.id, row.name, [row.name, row.city, row.state] + genres[row.id])
+    return index
+
+def index_stamp(model, relationship):
+    stamp = db.session.query(func.count(model.id), func.max(model.id), func.max(model.updated_at)).one()
+    return tuple(stamp) + (db.session.query(func.count()).select_from(relationship).scalar(),)
+
+def get_index(model, relationship, foreign_key):
+    ttl = app.config.get('SEARCH_INDEX_TTL', 10)
+    with _lock:
+        now = time.monotonic()
+        entry = _indexes.get(model.__tablename__)
+        if entry is not None and now - entry['checked_at'] < ttl:
+            return entry['index']
+        stamp = index_stamp(model, relationship)
+        if entry is None or entry['stamp'] != stamp:
+            entry = { 'index': build_index(model, relationship, foreign_key), 'stamp': stamp }
+            _indexes[model.__tablename__] = entry
+        entry['checked_at'] = now
+        return entry['index']
+
+# Trigram search in PostgreSQL. The matches are collected as a UNION of
+# branches that each have an index of their own: the name, city and state
+# ILIKEs their gin_trgm_ops indexes, and the genre match the genre_id index
+# of the link table, with the matching genres picked from the in-memory
+# genre registry first. The ranked query then only reads the matches.
+
+def trigram_search(model, relationship, foreign_key, term, limit = SEARCH_LIMIT):
+    term = term.strip()
+    pattern = '%' + escape_like(term) + '%'
+    branches = [
+        select(model.id.label('id')).where(column.ilike(pattern, escape = '\\'))
+        for column in (model.name, model.city, model.state)
+    ]
+    genre_ids = [genre.id for genre in genre_registry.all() if term.lower() in genre.name.lower()]
+    if genre_ids:
+        branches.append(
+            select(relationship.c[foreign_key].label('id')).where(relationship.c.genre_id.in_(genre_ids))
+        )
+    matches = union(*branches).subquery()
+    score = func.greatest(
+        func.similarity(model.name, term),
+        func.similarity(model.city, term),
+        func.similarity(model.state, term)
+    )
+    rows = db.session.query(
+        model.id,
+        model.name
+    ).join(
+        matches, matches.c.id == model.id
+    ).order_by(
+        score.desc(),
+        model.name,
+        model.id
+    ).limit(limit).all()
+    count = db.session.query(func.count()).select_from(matches).scalar()
+    return count, [{ 'id': row.id, 'name': row.name } for row in rows]
+
+def run_search(model, relationship, foreign_key, term):
+    if db.engine.dialect.name == 'postgresql':
+        return trigram_search(model, relationship, foreign_key, term)
+    return get_index(model, relationship, foreign_key).search(term)
+
+def find_venues(term):
+    return run_search(Venue, venue_genre_relationship, 'venue_id', term)
+
+def find_artists(term):
+    return run_search(Artist, artist_genre_relationship, 'artist_id', term)
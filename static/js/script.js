@@ -2,3 +2,70 @@ window.parseISOString = function parseISOString(s) {
   var b = s.split(/\D+/);
   return new Date(Date.UTC(b[0], --b[1], b[2], b[3], b[4], b[5], b[6]));
 };
+
+// Append the next page of shows in place of the "Load more" link
+$(document).on('click', '.load-more a', function (event) {
+  event.preventDefault();
+  var more = $(this).closest('.load-more');
+  $.get(this.href, function (html) {
+    more.replaceWith(html);
+  });
+});
+
+// Typeahead: fill the input's datalist from its suggest endpoint and copy
+// the id of the chosen suggestion into the hidden field it targets
+function chosenSuggestion(input, list) {
+  return list.find('option').filter(function () {
+    return this.value === input.val();
+  });
+}
+
+function loadSuggestions(input, list) {
+  clearTimeout(input.data('suggest-timer'));
+  input.data('suggest-timer', setTimeout(function () {
+    $.getJSON(input.data('suggest'), { q: input.val() }, function (response) {
+      list.empty();
+      $.each(response.data, function (i, item) {
+        list.append($('<option>').attr('value', item.name).data('id', item.id));
+      });
+    });
+  }, 150));
+}
+
+$(document).on('input', '[data-suggest-target]', function () {
+  var input = $(this);
+  var list = $('#' + input.attr('list'));
+  var match = chosenSuggestion(input, list);
+  $(input.data('suggest-target')).val(match.length ? match.data('id') : '');
+  loadSuggestions(input, list);
+});
+
+// Multi-valued typeahead: append the id of each chosen suggestion to the
+// comma separated hidden field, and its name to the visible list
+$(document).on('input', '[data-suggest-append]', function () {
+  var input = $(this);
+  var list = $('#' + input.attr('list'));
+  var match = chosenSuggestion(input, list);
+  if (match.length) {
+    var target = $(input.data('suggest-append'));
+    target.val(target.val() ? target.val() + ',' + match.data('id') : match.data('id'));
+    $(input.data('suggest-list')).append($('<li>').text(input.val()));
+    input.val('');
+  }
+  loadSuggestions(input, list);
+});
+
+// Venues near me: send the browser's location to /venues/near
+$(document).on('click', '[data-near-me]', function (event) {
+  if (!navigator.geolocation) {
+    return;
+  }
+  event.preventDefault();
+  var link = this;
+  navigator.geolocation.getCurrentPosition(function (position) {
+    window.location = link.pathname + '?' + $.param({
+      lat: position.coords.latitude.toFixed(5),
+      lng: position.coords.longitude.toFixed(5)
+    });
+  });
+});
@@ -0,0 +1,106 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import threading
+import time
+from bisect import bisect_left, insort
+from models import app, db, Artist, Venue
+
+#----------------------------------------------------------------------------#
+# Typeahead suggestions
+#----------------------------------------------------------------------------#
+
+# Names are kept in a sorted array of (key, id) pairs, with one key per word
+# so "sax" finds "The Wild Sax Band". A prefix lookup is a bisect to the
+# first key >= the prefix and a short walk while keys still match.
+
+class PrefixIndex:
+
+    def __init__(self, entries = ()):
+        self._names = {}
+        self._keys = {}
+        pairs = []
+        for entity_id, name in entries:
+            keys = self.keys_for(name)
+            self._names[entity_id] = name
+            self._keys[entity_id] = keys
+            pairs.extend((key, entity_id) for key in keys)
+        pairs.sort()
+        self._sorted = pairs
+
+    @staticmethod
+    def keys_for(name):
+        words = (name or '').lower().split()
+        return [' '.join(words[i:]) for i in range(len(words))]
+
+    def put(self, entity_id, name):
+        self.discard(entity_id)
+        keys = self.keys_for(name)
+        for key in keys:
+            insort(self._sorted, (key, entity_id))
+        self._names[entity_id] = name
+        self._keys[entity_id] = keys
+
+    def discard(self, entity_id):
+        for key in self._keys.pop(entity_id, []):
+            i = bisect_left(self._sorted, (key, entity_id))
+            if i < len(self._sorted) and self._sorted[i] == (key, entity_id):
+                del self._sorted[i]
+        self._names.pop(entity_id, None)
+
+    def search(self, prefix, limit = 10):
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        i = bisect_left(self._sorted, (prefix,))
+        while i < len(self._sorted) and len(results) < limit:
+            key, entity_id = self._sorted[i]
+            if not key.startswith(prefix):
+                break
+            if entity_id not in seen:
+                seen.add(entity_id)
+                results.append({ 'id': entity_id, 'name': self._names[entity_id] })
+            i += 1
+        return results
+
+# Per-process suggestion index for one model. It is built on first use,
+# kept current by the create, edit and delete handlers, and rebuilt every
+# SUGGEST_INDEX_TTL seconds to pick up writes made by other processes.
+
+class SuggestionIndex:
+
+    def __init__(self, model):
+        self.model = model
+        self._lock = threading.Lock()
+        self._index = None
+        self._built_at = 0.0
+
+    def _current(self):
+        ttl = app.config.get('SUGGEST_INDEX_TTL', 300)
+        with self._lock:
+            if self._index is None or time.monotonic() - self._built_at > ttl:
+                rows = db.session.query(self.model.id, self.model.name).all()
+                self._index = PrefixIndex(rows)
+                self._built_at = time.monotonic()
+            return self._index
+
+    def suggest(self, prefix, limit = 10):
+        index = self._current()
+        with self._lock:
+            return index.search(prefix, limit)
+
+    def put(self, entity_id, name):
+        with self._lock:
+            if self._index is not None:
+                self._index.put(entity_id, name)
+
+    def discard(self, entity_id):
+        with self._lock:
+            if self._index is not None:
+                self._index.discard(entity_id)
+
+artist_suggestions = SuggestionIndex(Artist)
+venue_suggestions = SuggestionIndex(Venue)
@@ -0,0 +1,98 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+
+# The app reads its database from the environment when it is imported, so
+# point it at a throwaway SQLite file first, and make any relationship load
+# a view did not plan for raise
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix = 'fyyur-tests-'), 'test.db')
+os.environ.pop('DATABASE_REPLICA_URLS', None)
+os.environ['RAISE_ON_LAZY_LOAD'] = '1'
+
+from app import app as flask_app
+from models import db, Genre, Venue, Artist, Show
+from genres import genre_registry
+from search import invalidate_search_index
+
+#----------------------------------------------------------------------------#
+# Fixtures
+#----------------------------------------------------------------------------#
+
+@pytest.fixture
+def app():
+    flask_app.config.update(TESTING = True, WTF_CSRF_ENABLED = False, PAGE_CACHE_ENABLED = False)
+    with flask_app.app_context():
+        db.create_all()
+        # In-memory catalogues must not outlive the tables they were built from
+        genre_registry.invalidate()
+        invalidate_search_index()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def catalogue(app):
+    """
+    Four genres, six venues in three cities, four artists and twenty shows,
+    half of them past
+    """
+    genres = [Genre(name = name, slug = name.lower()) for name in ('Jazz', 'Rock n Roll', 'Folk', 'Classical')]
+    cities = [('San Francisco', 'CA'), ('New York', 'NY'), ('Oakland', 'CA')]
+    venues = [
+        Venue(name = 'Venue %d' % i, city = cities[i % 3][0], state = cities[i % 3][1], address = '%d Main St' % i, genres = [genres[i % 4]])
+        for i in range(6)
+    ]
+    artists = [
+        Artist(name = 'Artist %d' % i, city = 'San Francisco', state = 'CA', genres = [genres[i % 4], genres[(i + 1) % 4]])
+        for i in range(4)
+    ]
+    db.session.add_all(genres + venues + artists)
+    db.session.flush()
+    now = datetime.now()
+    db.session.add_all([
+        Show(venue_id = venues[i % 6].id, artist_id = artists[i % 4].id, start_time = now + timedelta(days = i - 10, hours = 1))
+        for i in range(20)
+    ])
+    db.session.commit()
+    return { 'venues': [venue.id for venue in venues], 'artists': [artist.id for artist in artists] }
+
+class StatementCounter:
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    def _record(self, connection, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def __len__(self):
+        return len(self.statements)
+
+@pytest.fixture
+def count_statements(app):
+    """
+    Context manager counting the SQL statements run inside it
+    """
+    return lambda: StatementCounter(db.engine)
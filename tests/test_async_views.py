@@ -0,0 +1,31 @@
+#----------------------------------------------------------------------------#
+# Async views
+#----------------------------------------------------------------------------#
+
+# With ASYNC_VIEWS on, aio.py serves the listing and detail pages. They
+# must render the same HTML as the sync views in app.py, from the same
+# SQLite file (through aiosqlite).
+
+import inspect
+import pytest
+from aio import init_async_views
+
+def render(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    return response.get_data(as_text = True)
+
+@pytest.mark.parametrize('path', ['/venues', '/artists', '/shows', '/venues/%(venue)d', '/artists/%(artist)d'])
+def test_async_pages_match_sync_pages(app, client, catalogue, path):
+    path = path % { 'venue': catalogue['venues'][0], 'artist': catalogue['artists'][0] }
+    sync_page = render(client, path)
+
+    sync_views = dict(app.view_functions)
+    init_async_views(app)
+    try:
+        assert inspect.iscoroutinefunction(app.view_functions['venues'])
+        async_page = render(client, path)
+    finally:
+        app.view_functions.update(sync_views)
+
+    assert async_page == sync_page
@@ -0,0 +1,26 @@
+#----------------------------------------------------------------------------#
+# Template filters
+#----------------------------------------------------------------------------#
+
+import babel.dates
+import dateutil.parser
+import pytest
+from app import format_datetime, DATETIME_FORMATS
+
+# The filter must render what babel.dates.format_datetime renders for the
+# parsed value, offsets included
+
+@pytest.mark.parametrize('value', [
+    '2035-04-01 20:00:00',
+    '2019-05-21T21:30:00.000Z',
+    '2035-04-01T20:00:00+02:00',
+    '2035-04-01T20:00:00-07:00',
+])
+@pytest.mark.parametrize('format', ['medium', 'full', 'yyyy-MM-dd HH:mm zzz'])
+def test_format_datetime_matches_babel(value, format):
+    expected = babel.dates.format_datetime(dateutil.parser.parse(value), DATETIME_FORMATS.get(format, format))
+    assert format_datetime(value, format) == expected
+
+def test_format_datetime_keeps_the_offset():
+    assert format_datetime('2035-04-01T20:00:00+02:00', 'yyyy-MM-dd HH:mm zzz') == '2035-04-01 20:00 +0200'
+    assert format_datetime('2035-04-01T20:00:00+02:00') == 'Sun 04, 01, 2035 8:00PM'
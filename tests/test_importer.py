@@ -0,0 +1,54 @@
+#----------------------------------------------------------------------------#
+# Bulk import
+#----------------------------------------------------------------------------#
+
+import json
+from models import db, Genre, Venue, Show
+from importer import import_file
+
+def write_ndjson(path, records):
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    return str(path)
+
+def test_mixed_explicit_and_allocated_ids(app, tmp_path):
+    db.session.add(Genre(name = 'Jazz', slug = 'jazz'))
+    db.session.add(Venue(id = 1, name = 'Existing', city = 'Austin', state = 'TX'))
+    db.session.commit()
+
+    records = [
+        { 'name': 'No id A', 'city': 'Austin', 'state': 'TX', 'genres': ['jazz'] },
+        { 'id': 3, 'name': 'Three', 'city': 'Austin', 'state': 'TX', 'genres': ['jazz'] },
+        { 'name': 'No id B', 'city': 'Austin', 'state': 'TX' },
+        { 'id': 7, 'name': 'Seven', 'city': 'Austin', 'state': 'TX' },
+        { 'name': 'No id C', 'city': 'Austin', 'state': 'TX', 'genres': ['jazz'] },
+        { 'id': 2, 'name': 'Two', 'city': 'Austin', 'state': 'TX' },
+    ]
+    progress = import_file('venues', write_ndjson(tmp_path / 'venues.ndjson', records), batch_size = 4)
+    assert (progress.rows, progress.skipped) == (6, 0)
+
+    ids = dict(db.session.query(Venue.name, Venue.id))
+    assert (ids['Three'], ids['Seven'], ids['Two']) == (3, 7, 2)
+    allocated = [ids['No id A'], ids['No id B'], ids['No id C']]
+    assert len(set(ids.values())) == 7
+    assert not set(allocated) & { 1, 2, 3, 7 }
+
+    # Genre links follow the allocated ids
+    jazz = Genre.query.filter_by(slug = 'jazz').one()
+    linked = { venue.name for venue in Venue.query.filter(Venue.genres.contains(jazz)) }
+    assert linked == { 'No id A', 'Three', 'No id C' }
+
+def test_mixed_ids_for_shows(app, tmp_path):
+    write_ndjson(tmp_path / 'venues.ndjson', [{ 'id': 1, 'name': 'Hall', 'city': 'Austin', 'state': 'TX' }])
+    write_ndjson(tmp_path / 'artists.ndjson', [{ 'id': 1, 'name': 'Band', 'city': 'Austin', 'state': 'TX' }])
+    import_file('venues', str(tmp_path / 'venues.ndjson'), batch_size = 10)
+    import_file('artists', str(tmp_path / 'artists.ndjson'), batch_size = 10)
+
+    records = [
+        { 'id': 10, 'venue_id': 1, 'artist_id': 1, 'start_time': '2030-01-01T20:00:00' },
+        { 'venue': 'hall', 'artist': 'band', 'start_time': '2030-01-02T20:00:00' },
+        { 'venue_id': 1, 'artist_id': 1, 'start_time': '2030-01-03T20:00:00' },
+    ]
+    progress = import_file('shows', write_ndjson(tmp_path / 'shows.ndjson', records), batch_size = 10)
+    assert (progress.rows, progress.skipped) == (3, 0)
+    ids = sorted(id for (id,) in db.session.query(Show.id))
+    assert len(ids) == 3 and 10 in ids
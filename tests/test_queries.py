@@ -0,0 +1,59 @@
+#----------------------------------------------------------------------------#
+# Query count regressions
+#----------------------------------------------------------------------------#
+
+# Ceilings on the statements each read page runs. They do not depend on
+# how many venues, artists or shows there are; a view that starts loading
+# relationships one row at a time breaks them.
+
+import pytest
+
+@pytest.mark.parametrize('path, ceiling', [
+    ('/venues', 2),
+    ('/artists', 2),
+    ('/shows', 2),
+])
+def test_listing_statements(client, catalogue, count_statements, path, ceiling):
+    with count_statements() as statements:
+        response = client.get(path)
+    assert response.status_code == 200
+    assert len(statements) <= ceiling, statements.statements
+
+@pytest.mark.parametrize('kind', ['venues', 'artists'])
+def test_detail_statements(client, catalogue, count_statements, kind):
+    with count_statements() as statements:
+        response = client.get('/%s/%d' % (kind, catalogue[kind][0]))
+    assert response.status_code == 200
+    assert len(statements) <= 6, statements.statements
+
+def test_statements_do_not_grow_with_rows(client, catalogue, count_statements):
+    with count_statements() as before:
+        client.get('/venues')
+    client.post('/venues/create', data = {
+        'name': 'Venue 6',
+        'city': 'Austin',
+        'state': 'TX',
+        'address': '6 Main St',
+        'genres': ['1'],
+        'website': 'https://venue6.example.com',
+        'facebook_link': 'https://facebook.com/venue6',
+    })
+    with count_statements() as after:
+        response = client.get('/venues')
+    assert b'Venue 6' in response.data
+    assert len(after) == len(before)
+
+# Malformed cursors are a 400, whatever the values inside them
+
+@pytest.mark.parametrize('path, values', [
+    ('/shows', [12345, 1]),
+    ('/shows', ['2030-01-01T00:00:00', '1']),
+    ('/artists', [{ 'name': 'x' }, 1]),
+    ('/artists', [['x'], 1]),
+    ('/artists', [None, 1]),
+    ('/venues', ['CA', 'Oakland', 'Venue 2', True]),
+])
+def test_mistyped_cursor_values(client, catalogue, path, values):
+    from queries import encode_cursor
+    response = client.get(path, query_string = { 'cursor': encode_cursor(values) })
+    assert response.status_code == 400
@@ -0,0 +1,63 @@
+#----------------------------------------------------------------------------#
+# Read replicas
+#----------------------------------------------------------------------------#
+
+# A second SQLite file stands in for the replica. Both hold venue 1, under
+# different names, so each page shows which database it was read from.
+
+import os
+import pytest
+from sqlalchemy import insert
+from models import db, Genre, Venue
+
+@pytest.fixture
+def replica(app, tmp_path):
+    url = 'sqlite:///' + os.path.join(str(tmp_path), 'replica.db')
+    saved = { key: app.config[key] for key in ('DB_REPLICA_URLS', 'SQLALCHEMY_BINDS', 'DB_REPLICA_STICKY_SECONDS') }
+    app.config.update(DB_REPLICA_URLS = [url], SQLALCHEMY_BINDS = { 'replica_0': url }, DB_REPLICA_STICKY_SECONDS = 60)
+    engine = db.get_engine(app, bind = 'replica_0')
+    db.metadata.create_all(engine)
+
+    for bind, name in ((db.engine, 'Primary Hall'), (engine, 'Replica Hall')):
+        with bind.begin() as connection:
+            connection.execute(insert(Genre.__table__).values(id = 1, name = 'Jazz', slug = 'jazz'))
+            connection.execute(insert(Venue.__table__).values(id = 1, name = name, city = 'Austin', state = 'TX', address = '1 Main St'))
+    yield engine
+
+    app.extensions['sqlalchemy'].connectors.pop('replica_0', None)
+    engine.dispose()
+    app.config.update(saved)
+
+def venue_names(client):
+    page = client.get('/venues').get_data(as_text = True)
+    return [name for name in ('Primary Hall', 'Replica Hall', 'Renamed Hall') if name in page]
+
+def rename_venue(client):
+    response = client.post('/venues/1/edit', data = {
+        'name': 'Renamed Hall',
+        'city': 'Austin',
+        'state': 'TX',
+        'address': '1 Main St',
+        'phone': '',
+        'genres': ['1'],
+        'facebook_link': '',
+    })
+    assert response.status_code == 302
+
+def test_reads_go_to_the_replica(client, replica):
+    assert venue_names(client) == ['Replica Hall']
+
+def test_writes_go_to_the_primary(client, replica):
+    rename_venue(client)
+    assert db.session.query(Venue.name).filter(Venue.id == 1).scalar() == 'Renamed Hall'
+    with replica.connect() as connection:
+        assert connection.execute(Venue.__table__.select()).fetchone().name == 'Replica Hall'
+
+def test_reads_after_a_write_stick_to_the_primary(client, replica):
+    rename_venue(client)
+    assert venue_names(client) == ['Renamed Hall']
+
+    # Once the window has passed, reads go back to the replica
+    with client.session_transaction() as session:
+        session['db_primary_until'] = 0
+    assert venue_names(client) == ['Replica Hall']
@@ -0,0 +1,21 @@
+#----------------------------------------------------------------------------#
+# Search
+#----------------------------------------------------------------------------#
+
+from models import db, Venue
+from search import SEARCH_LIMIT
+
+def test_search_counts_every_match(client):
+    db.session.add_all([
+        Venue(name = 'Venue %d' % i, city = 'Austin', state = 'TX')
+        for i in range(SEARCH_LIMIT + 1)
+    ])
+    db.session.commit()
+
+    response = client.post('/venues/search', data = { 'search_term': '' })
+    page = response.get_data(as_text = True)
+    assert 'Number of search results for "": %d' % (SEARCH_LIMIT + 1) in page
+    assert page.count('<a href="/venues/') == SEARCH_LIMIT
+
+    response = client.post('/venues/search', data = { 'search_term': 'venue 10' })
+    assert 'Number of search results for "venue 10": 2' in response.get_data(as_text = True)
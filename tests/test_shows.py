@@ -0,0 +1,26 @@
+#----------------------------------------------------------------------------#
+# Batch show creation
+#----------------------------------------------------------------------------#
+
+from datetime import datetime, timedelta
+from models import db, Venue, Artist, Show, UpcomingShowFeed
+
+def test_batch_adds_its_shows_to_the_feed(client):
+    venue = Venue(name = 'The Hall', city = 'Austin', state = 'TX')
+    artist = Artist(name = 'The Band', city = 'Austin', state = 'TX')
+    db.session.add_all([venue, artist])
+    db.session.commit()
+    venue_id, artist_id = venue.id, artist.id
+
+    first = datetime.now().replace(second = 0, microsecond = 0) + timedelta(days = 1)
+    start_times = [first + timedelta(days = 7 * week) for week in range(3)]
+    response = client.post('/shows/create/batch', data = {
+        'artist_id': artist_id,
+        'venue_ids': str(venue_id),
+        'start_times': '\n'.join(start_time.strftime('%Y-%m-%d %H:%M') for start_time in start_times),
+    })
+    assert response.status_code == 302
+
+    show_ids = sorted(show_id for show_id, in db.session.query(Show.id).filter(Show.artist_id == artist_id))
+    assert len(show_ids) == 3
+    assert sorted(show_id for show_id, in db.session.query(UpcomingShowFeed.show_id)) == show_ids
@@ -0,0 +1,95 @@
+#----------------------------------------------------------------------------#
+# Export / import round trip
+#----------------------------------------------------------------------------#
+
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
+from models import db, Genre, Venue, Artist, Show, venue_genre_relationship, artist_genre_relationship
+from exporter import export_snapshot, row_record, entity_record
+from importer import import_snapshot
+from genres import genre_registry
+from geo import location_columns
+
+VENUES = 3000
+ARTISTS = 3000
+SHOWS = 10000
+
+def generate(seed = 7):
+    """
+    Bulk insert a synthetic catalogue, with some empty optional fields
+    """
+    rng = random.Random(seed)
+    now = datetime(2026, 10, 18, 12, 0)
+    db.session.execute(Genre.__table__.insert(), [
+        { 'id': i, 'name': 'Genre %d' % i, 'slug': 'genre-%d' % i } for i in range(1, 11)
+    ])
+    db.session.execute(Venue.__table__.insert(), [{
+        'id': i,
+        'name': 'Venue %d' % i,
+        'slug': 'venue-%d' % i,
+        'city': rng.choice(['New York', 'Austin', 'Seattle']),
+        'state': rng.choice(['NY', 'TX', 'WA']),
+        'address': '%d Main St' % i,
+        'phone': None if i % 5 else '555-0%03d' % (i % 1000),
+        'seeking_talent': i % 3 == 0,
+        'seeking_description': 'Wanted: "anyone", ünïcode' if i % 3 == 0 else None,
+        'updated_at': now - timedelta(minutes = i),
+        **location_columns(40.0 + i / 10000.0, -74.0)
+    } for i in range(1, VENUES + 1)])
+    db.session.execute(Artist.__table__.insert(), [{
+        'id': i,
+        'name': 'Artist %d' % i,
+        'slug': 'artist-%d' % i,
+        'city': 'Austin',
+        'state': 'TX',
+        'seeking_venues': i % 2 == 0,
+        'updated_at': now - timedelta(seconds = i),
+    } for i in range(1, ARTISTS + 1)])
+    db.session.execute(venue_genre_relationship.insert(), [
+        { 'venue_id': i, 'genre_id': 1 + i % 10 } for i in range(1, VENUES + 1)
+    ])
+    db.session.execute(artist_genre_relationship.insert(), [
+        { 'artist_id': i, 'genre_id': genre_id } for i in range(1, ARTISTS + 1) for genre_id in (1 + i % 10, 1 + (i + 3) % 10)
+    ])
+    db.session.execute(Show.__table__.insert(), [{
+        'id': i,
+        'venue_id': rng.randint(1, VENUES),
+        'artist_id': rng.randint(1, ARTISTS),
+        'start_time': now + timedelta(hours = rng.randint(-5000, 5000)),
+        'updated_at': now,
+    } for i in range(1, SHOWS + 1)])
+    db.session.commit()
+
+def counts():
+    return [
+        db.session.query(func.count()).select_from(table).scalar()
+        for table in (Genre.__table__, Venue.__table__, Artist.__table__, Show.__table__, venue_genre_relationship, artist_genre_relationship)
+    ]
+
+def sample(ids):
+    return {
+        'venues': [entity_record(Venue.query.options(selectinload(Venue.genres)).get(i)) for i in ids],
+        'artists': [entity_record(Artist.query.options(selectinload(Artist.genres)).get(i)) for i in ids],
+        'shows': [row_record(Show.query.get(i)) for i in ids],
+    }
+
+def test_snapshot_round_trip(app, tmp_path):
+    generate()
+    before = counts()
+    ids = sorted(random.Random(1).sample(range(1, VENUES + 1), 50)) + [1, VENUES]
+    expected = sample(ids)
+
+    exported = export_snapshot(str(tmp_path), batch_size = 1000)
+    assert exported == { 'genres': 10, 'venues': VENUES, 'artists': ARTISTS, 'shows': SHOWS }
+
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    genre_registry.invalidate()
+
+    import_snapshot(str(tmp_path), batch_size = 1000)
+    db.session.expunge_all()
+    assert counts() == before
+    assert sample(ids) == expected
@@ -2,7 +2,10 @@
 # Imports
 #----------------------------------------------------------------------------#
 
+from collections import OrderedDict
 from enum import Enum, auto
+import threading
+import time
 
 #----------------------------------------------------------------------------#
 # Utils
@@ -85,3 +88,60 @@ class State(Enum):
     @classmethod
     def choices(states):
         return [ (state.value, state.value) for state in states ]
+
+# Small thread-safe LRU cache whose entries expire after ttl seconds
+# (never, when ttl is None)
+
+class TTLCache:
+    def __init__(self, maxsize = 128, ttl = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, key, default = None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] is not None and entry[0] <= now:
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def store(self, key, value, ttl = None, generation = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            # Don't store a value computed before an invalidation landed
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last = False)
+
+    def get(self, key, loader, ttl = None):
+        """
+        Return the cached value for key, calling loader() to fill it when it
+        is missing or expired
+        """
+        missing = object()
+        value = self.lookup(key, missing)
+        if value is not missing:
+            return value
+        generation = self._generation
+        value = loader()
+        self.store(key, value, ttl, generation)
+        return value
+
+    def invalidate(self, key = None):
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)